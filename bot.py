@@ -1,10 +1,19 @@
 import os
+import io
+import shutil
 import json
 import re
 import asyncio
+import functools
 from pathlib import Path
-import uuid
-from datetime import datetime, timedelta
+import sys
+import time
+import secrets
+import threading
+from collections import Counter, deque
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
 
 import discord
 from discord import app_commands, ui, SelectOption
@@ -13,7 +22,7 @@ from dotenv import load_dotenv
 import google.generativeai as genai
 from aiohttp import web
 import mysql.connector
-from mysql.connector import Error
+from mysql.connector import Error, pooling
 
 import firebase_admin
 from firebase_admin import credentials, firestore
@@ -21,6 +30,16 @@ import math
 import random
 import yt_dlp
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:  # not available on Windows
+    uvloop = None
+
 
 # ────────────────────────────────────────────────
 # ENV
@@ -29,7 +48,6 @@ load_dotenv()
 
 DISCORD_BOT_TOKEN = os.getenv("DISCORD_BOT_TOKEN")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
 DEFAULT_GUILD_ID = os.getenv("DEFAULT_GUILD_ID")
 
 MYSQL_HOST = os.getenv("MYSQL_HOST")
@@ -37,6 +55,14 @@ MYSQL_USER = os.getenv("MYSQL_USER")
 MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD")
 MYSQL_DATABASE = os.getenv("MYSQL_DATABASE")
 
+# Upper bound on events pinging at the same time across all guilds
+MAX_ACTIVE_REMINDERS = int(os.getenv("MAX_ACTIVE_REMINDERS", "500"))
+# Web upload limits; client_max_size doesn't cover request.multipart()
+MAX_UPLOAD_FILE_BYTES = int(os.getenv("MAX_UPLOAD_FILE_BYTES", str(25 * 1024 * 1024)))
+MAX_UPLOAD_REQUEST_BYTES = int(os.getenv("MAX_UPLOAD_REQUEST_BYTES", str(100 * 1024 * 1024)))
+# The upload web server stays off unless explicitly enabled
+WEB_UPLOADS_ENABLED = os.getenv("WEB_UPLOADS_ENABLED", "").lower() in ("1", "true", "yes")
+
 if not DISCORD_BOT_TOKEN or not GEMINI_API_KEY:
     raise RuntimeError("Missing required environment variables")
 
@@ -46,10 +72,214 @@ if not DEFAULT_GUILD_ID:
 if not all([MYSQL_HOST, MYSQL_USER, MYSQL_PASSWORD, MYSQL_DATABASE]):
     raise RuntimeError("Missing one or more MySQL environment variables: MYSQL_HOST, MYSQL_USER, MYSQL_PASSWORD, MYSQL_DATABASE")
 
+# ────────────────────────────────────────────────
+# IN-MEMORY CACHES
+# ────────────────────────────────────────────────
+_MISSING = object()
+
+
+class TTLCache:
+    # Size-bounded dict whose entries expire `ttl` seconds after being set.
+    # Oldest entries are evicted first once `maxsize` is reached.
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = {}
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            return default
+        return value
+
+    def set(self, key, value):
+        self._data.pop(key, None)
+        while len(self._data) >= self.maxsize:
+            self._data.pop(next(iter(self._data)))
+        self._data[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+
+# username → reg_number (None is cached too: "not registered")
+_registration_cache = TTLCache(maxsize=1024, ttl=3600)
+# discord_id → users_info row (None too: "first-time user")
+_user_info_cache = TTLCache(maxsize=10_000, ttl=600)
+# discord_ids that have a users_info row, loaded at startup; None if that
+# load failed and /talk has to ask the database
+known_users = None
+
+# (guild_id, table) → counter bumped by every db_* write to that table
+_data_versions = {}
+_versions_lock = threading.Lock()  # writes bump from executor threads
+# (guild_id, table, view) → (version of the rows they were built from, [SelectOption, ...])
+_options_cache = {}
+
+
+def bump_version(guild_id: str, table: str):
+    key = (guild_id, table)
+    # Read-then-write: two writers to one table must not land on the same number
+    with _versions_lock:
+        _data_versions[key] = _data_versions.get(key, 0) + 1
+
+
+def cached_select_options(guild_id, table: str, view: str, rows, build, rows_version: int = -1):
+    # Reuse the options built for this guild's rows until the table changes.
+    # The entry is tagged with the version `rows` was fetched under (see
+    # rows_version), not the current one, so options built from rows that
+    # raced a write are rebuilt next time instead of being kept.
+    # Callers get a fresh list each time since ui.Select keeps a reference.
+    if guild_id is None:
+        return [build(row_id, data) for row_id, data in rows]
+    key = (guild_id, table, view)
+    entry = _options_cache.get(key)
+    if entry is None or entry[0] != _data_versions.get((guild_id, table), 0):
+        entry = (rows_version, [build(row_id, data) for row_id, data in rows])
+        if rows_version >= 0:
+            _options_cache[key] = entry
+    return list(entry[1])
+
+
+ROWS_TTL = 30
+# (guild_id, table) → (expires_at, version, rows)
+_rows_cache = {}
+# (guild_id, table) → asyncio.Lock, so a burst of misses does one query
+_rows_locks = {}
+
+
+def _fresh_rows(key):
+    entry = _rows_cache.get(key)
+    if entry and entry[0] > time.monotonic() and entry[1] == _data_versions.get(key, 0):
+        return entry[2]
+    return None
+
+
+async def cached_rows(guild_id: str, table: str, fetch):
+    # Short-lived per-guild copy of a db_get_* result, dropped early by any
+    # write to the table (see bump_version). Callers must not mutate it.
+    key = (guild_id, table)
+    rows = _fresh_rows(key)
+    if rows is not None:
+        return rows
+    async with _rows_locks.setdefault(key, asyncio.Lock()):
+        rows = _fresh_rows(key)
+        if rows is None:
+            version = _data_versions.get(key, 0)
+            rows = await fetch(guild_id)
+            _rows_cache[key] = (time.monotonic() + ROWS_TTL, version, rows)
+        return rows
+
+
+def rows_version(guild_id: str, table: str, rows) -> int:
+    # Version a cached_rows() result was fetched under; -1 once it is no
+    # longer the cached list, so nothing built from it gets reused
+    cached = _rows_cache.get((guild_id, table))
+    return cached[1] if cached is not None and cached[2] is rows else -1
+
+
+# guild_id → (notes version, Counter of note subjects, /fetch-notes text,
+# select options). Primed from the rows, then kept current by db_add_note;
+# text and options are only rebuilt when a new subject appears. If the
+# notes version moves past what the entry accounts for (a write it didn't
+# see), the next listing primes it again from fresh rows.
+_note_subjects = {}
+
+
+def _subjects_entry(version: int, counts: Counter) -> tuple:
+    subjects = tuple(sorted(counts))
+    text = "**Available Subjects:**\n" + "\n".join(f"• {s}" for s in subjects)
+    if len(subjects) > SELECT_PAGE_SIZE:
+        # Only the select is capped; the list above stays complete
+        text += f"\n\nSelect a subject to view notes (menu shows the first {SELECT_PAGE_SIZE}):"
+    else:
+        text += "\n\nSelect a subject to view notes:"
+    options = tuple(SelectOption(label=s, value=s) for s in subjects[:SELECT_PAGE_SIZE])
+    return version, counts, text, options
+
+
+def note_subjects(guild_id: str, notes_data: list) -> tuple[str, tuple[SelectOption, ...]]:
+    key = (guild_id, "notes")
+    entry = _note_subjects.get(guild_id)
+    if entry is None or entry[0] != _data_versions.get(key, 0):
+        # Tag the index with the version these rows were fetched under, so
+        # rows that raced a write are replaced on a later listing
+        entry = _note_subjects[guild_id] = _subjects_entry(
+            rows_version(guild_id, "notes", notes_data), Counter(data['subject'] for data in notes_data))
+    return entry[2], entry[3]
+
+
+def index_note_subject(guild_id: str, subject: str):
+    # Called right after db_add_note's insert bumped the notes version. Only
+    # an entry that was current before that bump can absorb it; anything
+    # else (unprimed, or another write in between) is re-primed on listing
+    entry = _note_subjects.get(guild_id)
+    version = _data_versions.get((guild_id, "notes"), 0)
+    if entry is None or entry[0] != version - 1:
+        return
+    counts = entry[1]
+    counts[subject] += 1
+    if counts[subject] == 1:
+        _note_subjects[guild_id] = _subjects_entry(version, counts)
+    else:
+        _note_subjects[guild_id] = (version, *entry[1:])
+
 # ────────────────────────────────────────────────
 # DATABASE CONNECTION
 # ────────────────────────────────────────────────
-async def get_db_connection():
+def run_in_thread(func):
+    # mysql.connector is blocking: run the whole helper (connect, execute,
+    # commit, close) on the default executor so the event loop keeps going
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await asyncio.to_thread(func, *args, **kwargs)
+    return wrapper
+
+
+# JSON-in-TEXT columns (members, file_paths): orjson when available
+if orjson is not None:
+    json_loads = orjson.loads
+
+    def json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+else:
+    json_loads = json.loads
+    json_dumps = json.dumps
+
+
+DB_POOL_SIZE = 10
+_db_pool = None  # created in init_services; None means connect per call
+
+
+def create_db_pool():
+    global _db_pool
+    try:
+        _db_pool = pooling.MySQLConnectionPool(
+            pool_name="joi",
+            pool_size=DB_POOL_SIZE,
+            host=MYSQL_HOST,
+            user=MYSQL_USER,
+            password=MYSQL_PASSWORD,
+            database=MYSQL_DATABASE
+        )
+    except Error as e:
+        print(f"Error creating MySQL pool, connecting per call: {e}")
+
+
+def get_db_connection():
+    # A pooled connection's close() hands it back (after a session reset)
+    # instead of tearing down the socket. When every pooled connection is
+    # busy, fall through to a one-off connection rather than failing.
+    if _db_pool is not None:
+        try:
+            return _db_pool.get_connection()
+        except Error:
+            pass
     try:
         conn = mysql.connector.connect(
             host=MYSQL_HOST,
@@ -62,12 +292,43 @@ async def get_db_connection():
         print(f"Error connecting to MySQL database: {e}")
         return None
 
-async def initialize_db():
-    conn = await get_db_connection()
+def close_quietly(cursor, conn):
+    # close() without the is_connected() ping: that costs a server round
+    # trip on every query just to find out whether to close
+    for closable in (cursor, conn):
+        if closable is None:
+            continue
+        try:
+            closable.close()
+        except Error:
+            pass
+
+# Fixed per-table reads, built once instead of per call
+SQL_GET_REMINDERS = "SELECT reminder_id, title, creator_id, datetime, channel_id FROM reminders WHERE guild_id = %s"
+SQL_GET_TODOS = "SELECT task_id, text, created_by, created_at FROM todos WHERE guild_id = %s"
+SQL_GET_EVENTS = "SELECT event_id, title, members, creator_id, datetime, channel_id FROM events WHERE guild_id = %s"
+SQL_GET_ASSIGNMENTS = "SELECT assignment_id, title, description, deadline, subject, file_paths, creator_id FROM assignments WHERE guild_id = %s"
+SQL_GET_NOTES = "SELECT note_id, title, subject, file_paths, creator_id FROM notes WHERE guild_id = %s"
+SQL_GET_REMINDER = SQL_GET_REMINDERS + " AND reminder_id = %s"
+# Startup rehydration: every guild's still-pending rows in one query each.
+# The cutoff is the bot's own datetime.now(), not the DB session's NOW(),
+# so it matches the clock schedule_spam/schedule_reminder compare against
+SQL_GET_UPCOMING_REMINDERS = "SELECT guild_id, reminder_id, title, creator_id, datetime, channel_id FROM reminders WHERE datetime > %s AND channel_id IS NOT NULL"
+SQL_GET_UPCOMING_EVENTS = "SELECT guild_id, event_id, title, members, creator_id, datetime, channel_id FROM events WHERE datetime > %s AND channel_id IS NOT NULL"
+SQL_GET_ASSIGNMENT = SQL_GET_ASSIGNMENTS + " AND assignment_id = %s"
+SQL_GET_NOTE = SQL_GET_NOTES + " AND note_id = %s"
+SQL_GET_REGISTRATION = "SELECT reg_number FROM registrations WHERE username = %s"
+SQL_GET_USER_INFO = "SELECT discord_id, username, nickname, age, mood, hobbies, challenges, created_at FROM users_info WHERE discord_id = %s"
+SQL_GET_PERSONALITY = "SELECT personality_id, personality_name FROM joi_personality WHERE discord_id = %s"
+
+@run_in_thread
+def initialize_db():
+    conn = get_db_connection()
     if conn is None:
         print("Failed to initialize database: No connection.")
         return
 
+    cursor = None
     try:
         cursor = conn.cursor()
 
@@ -214,80 +475,128 @@ async def initialize_db():
     except Error as e:
         print(f"Error initializing database tables: {e}")
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
 # ────────────────────────────────────────────────
 # DATABASE REMINDERS FUNCTIONS
 # ────────────────────────────────────────────────
-async def db_get_reminders(guild_id: str):
-    conn = await get_db_connection()
+def _reminder_row(r: dict) -> dict:
+    return {
+        "reminder_id": r["reminder_id"],
+        "title": r["title"],
+        "creator_id": r["creator_id"],
+        "datetime": r["datetime"].isoformat() if r["datetime"] else None,
+        "datetime_obj": r["datetime"],
+        "channel_id": int(r["channel_id"]) if r["channel_id"] else None,
+    }
+
+@run_in_thread
+def db_get_reminders(guild_id: str):
+    conn = get_db_connection()
     if conn is None:
         return []
+    cursor = None
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT reminder_id, title, creator_id, datetime, channel_id FROM reminders WHERE guild_id = %s", (guild_id,))
-        reminders_data = cursor.fetchall()
-        return [
-            {
-                "reminder_id": r["reminder_id"],
-                "title": r["title"],
-                "creator_id": r["creator_id"],
-                "datetime": r["datetime"].isoformat() if r["datetime"] else None,
-                "channel_id": int(r["channel_id"]) if r["channel_id"] else None,
-            }
-            for r in reminders_data
-        ]
+        cursor.execute(SQL_GET_REMINDERS, (guild_id,))
+        return [_reminder_row(r) for r in cursor.fetchall()]
     except Error as e:
         print(f"Error getting reminders: {e}")
         return []
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
+
+@run_in_thread
+def db_get_upcoming_reminders():
+    # (guild_id, reminder) for every guild, for rescheduling after a restart;
+    # None when the read failed, so the caller can tell it from "none due"
+    conn = get_db_connection()
+    if conn is None:
+        return None
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(SQL_GET_UPCOMING_REMINDERS, (datetime.now(),))
+        return [(r["guild_id"], _reminder_row(r)) for r in cursor.fetchall()]
+    except Error as e:
+        print(f"Error getting upcoming reminders: {e}")
+        return None
+    finally:
+        close_quietly(cursor, conn)
+
+@run_in_thread
+def db_get_reminder(guild_id: str, reminder_id: str):
+    conn = get_db_connection()
+    if conn is None:
+        return None
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(SQL_GET_REMINDER, (guild_id, reminder_id))
+        row = cursor.fetchone()
+        return _reminder_row(row) if row else None
+    except Error as e:
+        print(f"Error getting reminder: {e}")
+        return None
+    finally:
+        close_quietly(cursor, conn)
 
 async def db_add_reminder(guild_id: str, reminder_id: str, title: str, creator_id: str, datetime_obj: datetime, channel_id: int):
-    conn = await get_db_connection()
+    return await db_add_reminders_bulk([(reminder_id, guild_id, title, creator_id, datetime_obj, channel_id)])
+
+@run_in_thread
+def db_add_reminders_bulk(rows: list[tuple]):
+    # rows: (reminder_id, guild_id, title, creator_id, datetime_obj, channel_id)
+    if not rows:
+        return True
+    conn = get_db_connection()
     if conn is None:
         return False
+    cursor = None
     try:
         cursor = conn.cursor()
-        cursor.execute(
+        cursor.executemany(
             "INSERT INTO reminders (reminder_id, guild_id, title, creator_id, datetime, channel_id) VALUES (%s, %s, %s, %s, %s, %s)",
-            (reminder_id, guild_id, title, creator_id, datetime_obj, str(channel_id))
+            [
+                (reminder_id, guild_id, title, creator_id, datetime_obj,
+                 str(channel_id) if channel_id is not None else None)
+                for reminder_id, guild_id, title, creator_id, datetime_obj, channel_id in rows
+            ]
         )
         conn.commit()
+        for guild_id in {row[1] for row in rows}:
+            bump_version(guild_id, "reminders")
         return True
     except Error as e:
-        print(f"Error adding reminder: {e}")
+        print(f"Error adding reminders: {e}")
         return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
-async def db_delete_reminder(guild_id: str, reminder_id: str):
-    conn = await get_db_connection()
+@run_in_thread
+def db_delete_reminder(guild_id: str, reminder_id: str):
+    conn = get_db_connection()
     if conn is None:
         return False
+    cursor = None
     try:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM reminders WHERE guild_id = %s AND reminder_id = %s", (guild_id, reminder_id))
         conn.commit()
+        bump_version(guild_id, "reminders")
         return cursor.rowcount > 0
     except Error as e:
         print(f"Error deleting reminder: {e}")
         return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
-async def db_update_reminder_datetime(guild_id: str, reminder_id: str, datetime_obj: datetime, channel_id: int):
-    conn = await get_db_connection()
+@run_in_thread
+def db_update_reminder_datetime(guild_id: str, reminder_id: str, datetime_obj: datetime, channel_id: int):
+    conn = get_db_connection()
     if conn is None:
         return False
+    cursor = None
     try:
         cursor = conn.cursor()
         cursor.execute(
@@ -295,25 +604,26 @@ async def db_update_reminder_datetime(guild_id: str, reminder_id: str, datetime_
             (datetime_obj, str(channel_id), guild_id, reminder_id)
         )
         conn.commit()
+        bump_version(guild_id, "reminders")
         return cursor.rowcount > 0
     except Error as e:
         print(f"Error updating reminder datetime: {e}")
         return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
 # ────────────────────────────────────────────────
 # DATABASE TODO FUNCTIONS
 # ────────────────────────────────────────────────
-async def db_get_todos(guild_id: str):
-    conn = await get_db_connection()
+@run_in_thread
+def db_get_todos(guild_id: str):
+    conn = get_db_connection()
     if conn is None:
         return []
+    cursor = None
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT task_id, text, created_by, created_at FROM todos WHERE guild_id = %s", (guild_id,))
+        cursor.execute(SQL_GET_TODOS, (guild_id,))
         todos_data = cursor.fetchall()
         return [
             {
@@ -321,6 +631,8 @@ async def db_get_todos(guild_id: str):
                 "text": t["text"],
                 "created_by": t["created_by"],
                 "created_at": t["created_at"].isoformat(),
+                # Discord renders <t:…:f> in each viewer's locale
+                "created_at_display": f"<t:{int(t['created_at'].timestamp())}:f>",
             }
             for t in todos_data
         ]
@@ -328,14 +640,14 @@ async def db_get_todos(guild_id: str):
         print(f"Error getting todos: {e}")
         return []
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
-async def db_add_todo(guild_id: str, task_id: str, text: str, created_by: str, created_at: datetime):
-    conn = await get_db_connection()
+@run_in_thread
+def db_add_todo(guild_id: str, task_id: str, text: str, created_by: str, created_at: datetime):
+    conn = get_db_connection()
     if conn is None:
         return False
+    cursor = None
     try:
         cursor = conn.cursor()
         cursor.execute(
@@ -343,103 +655,127 @@ async def db_add_todo(guild_id: str, task_id: str, text: str, created_by: str, c
             (task_id, guild_id, text, created_by, created_at)
         )
         conn.commit()
+        bump_version(guild_id, "todos")
         return True
     except Error as e:
         print(f"Error adding todo: {e}")
         return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
-async def db_delete_todo(guild_id: str, task_id: str):
-    conn = await get_db_connection()
+@run_in_thread
+def db_delete_todo(guild_id: str, task_id: str):
+    conn = get_db_connection()
     if conn is None:
         return False
+    cursor = None
     try:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM todos WHERE guild_id = %s AND task_id = %s", (guild_id, task_id))
         conn.commit()
+        bump_version(guild_id, "todos")
         return cursor.rowcount > 0
     except Error as e:
         print(f"Error deleting todo: {e}")
         return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
 # ────────────────────────────────────────────────
 # DATABASE EVENTS FUNCTIONS
 # ────────────────────────────────────────────────
-async def db_get_events(guild_id: str):
-    conn = await get_db_connection()
+def _event_row(e: dict) -> dict:
+    return {
+        "event_id": e["event_id"],
+        "title": e["title"],
+        "members": json_loads(e["members"]) if e["members"] else [],
+        "creator_id": e["creator_id"],
+        "datetime": e["datetime"].isoformat() if e["datetime"] else None,
+        "datetime_obj": e["datetime"],
+        "datetime_display": e["datetime"].strftime("%Y-%m-%d %H:%M") if e["datetime"] else None,
+        "channel_id": int(e["channel_id"]) if e["channel_id"] else None,
+    }
+
+@run_in_thread
+def db_get_events(guild_id: str):
+    conn = get_db_connection()
     if conn is None:
         return []
+    cursor = None
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT event_id, title, members, creator_id, datetime, channel_id FROM events WHERE guild_id = %s", (guild_id,))
-        events_data = cursor.fetchall()
-        return [
-            {
-                "event_id": e["event_id"],
-                "title": e["title"],
-                "members": json.loads(e["members"]) if e["members"] else [],
-                "creator_id": e["creator_id"],
-                "datetime": e["datetime"].isoformat() if e["datetime"] else None,
-                "channel_id": int(e["channel_id"]) if e["channel_id"] else None,
-            }
-            for e in events_data
-        ]
+        cursor.execute(SQL_GET_EVENTS, (guild_id,))
+        return [_event_row(e) for e in cursor.fetchall()]
     except Error as e:
         print(f"Error getting events: {e}")
         return []
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
-async def db_add_event(guild_id: str, event_id: str, title: str, members: list, creator_id: str, datetime_obj: datetime, channel_id: int):
-    conn = await get_db_connection()
+@run_in_thread
+def db_get_upcoming_events():
+    # (guild_id, event) for every guild, for rescheduling after a restart;
+    # None when the read failed, so the caller can tell it from "none due"
+    conn = get_db_connection()
+    if conn is None:
+        return None
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(SQL_GET_UPCOMING_EVENTS, (datetime.now(),))
+        return [(e["guild_id"], _event_row(e)) for e in cursor.fetchall()]
+    except Error as e:
+        print(f"Error getting upcoming events: {e}")
+        return None
+    finally:
+        close_quietly(cursor, conn)
+
+@run_in_thread
+def db_add_event(guild_id: str, event_id: str, title: str, members: list, creator_id: str, datetime_obj: datetime, channel_id: int):
+    conn = get_db_connection()
     if conn is None:
         return False
+    cursor = None
     try:
         cursor = conn.cursor()
         cursor.execute(
             "INSERT INTO events (event_id, guild_id, title, members, creator_id, datetime, channel_id) VALUES (%s, %s, %s, %s, %s, %s, %s)",
-            (event_id, guild_id, title, json.dumps(members), creator_id, datetime_obj, str(channel_id))
+            (event_id, guild_id, title, json_dumps(members), creator_id, datetime_obj,
+             str(channel_id) if channel_id is not None else None)
         )
         conn.commit()
+        bump_version(guild_id, "events")
         return True
     except Error as e:
         print(f"Error adding event: {e}")
         return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
-async def db_delete_event(guild_id: str, event_id: str):
-    conn = await get_db_connection()
+@run_in_thread
+def db_delete_event(guild_id: str, event_id: str):
+    conn = get_db_connection()
     if conn is None:
         return False
+    cursor = None
     try:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM events WHERE guild_id = %s AND event_id = %s", (guild_id, event_id))
         conn.commit()
+        bump_version(guild_id, "events")
         return cursor.rowcount > 0
     except Error as e:
         print(f"Error deleting event: {e}")
         return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
-async def db_update_event_datetime(guild_id: str, event_id: str, datetime_obj: datetime, channel_id: int):
-    conn = await get_db_connection()
+@run_in_thread
+def db_update_event_datetime(guild_id: str, event_id: str, datetime_obj: datetime, channel_id: int):
+    conn = get_db_connection()
     if conn is None:
         return False
+    cursor = None
     try:
         cursor = conn.cursor()
         cursor.execute(
@@ -447,196 +783,267 @@ async def db_update_event_datetime(guild_id: str, event_id: str, datetime_obj: d
             (datetime_obj, str(channel_id), guild_id, event_id)
         )
         conn.commit()
+        bump_version(guild_id, "events")
         return cursor.rowcount > 0
     except Error as e:
         print(f"Error updating event datetime: {e}")
         return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
 # ────────────────────────────────────────────────
 # DATABASE ASSIGNMENT FUNCTIONS
 # ────────────────────────────────────────────────
-async def db_get_assignments(guild_id: str):
-    conn = await get_db_connection()
+def _assignment_row(a: dict) -> dict:
+    return {
+        "assignment_id": a["assignment_id"],
+        "title": a["title"],
+        "description": a["description"],
+        "deadline": a["deadline"].strftime("%Y-%m-%d %H:%M") if a["deadline"] else None,
+        "subject": a["subject"],
+        "file_paths": json_loads(a["file_paths"]) if a["file_paths"] else [],
+        "creator_id": a["creator_id"],
+    }
+
+@run_in_thread
+def db_get_assignments(guild_id: str):
+    conn = get_db_connection()
     if conn is None:
         return []
+    cursor = None
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT assignment_id, title, description, deadline, subject, file_paths, creator_id FROM assignments WHERE guild_id = %s", (guild_id,))
-        assignments_data = cursor.fetchall()
-        return [
-            {
-                "assignment_id": a["assignment_id"],
-                "title": a["title"],
-                "description": a["description"],
-                "deadline": a["deadline"].strftime("%Y-%m-%d %H:%M") if a["deadline"] else None,
-                "subject": a["subject"],
-                "file_paths": json.loads(a["file_paths"]) if a["file_paths"] else [],
-                "creator_id": a["creator_id"],
-            }
-            for a in assignments_data
-        ]
+        cursor.execute(SQL_GET_ASSIGNMENTS, (guild_id,))
+        return [_assignment_row(a) for a in cursor.fetchall()]
     except Error as e:
         print(f"Error getting assignments: {e}")
         return []
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
-async def db_add_assignment(guild_id: str, assignment_id: str, title: str, description: str, deadline: datetime, subject: str, file_paths: list, creator_id: str):
-    conn = await get_db_connection()
+@run_in_thread
+def db_get_assignment(guild_id: str, assignment_id: str):
+    conn = get_db_connection()
+    if conn is None:
+        return None
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(SQL_GET_ASSIGNMENT, (guild_id, assignment_id))
+        row = cursor.fetchone()
+        return _assignment_row(row) if row else None
+    except Error as e:
+        print(f"Error getting assignment: {e}")
+        return None
+    finally:
+        close_quietly(cursor, conn)
+
+@run_in_thread
+def db_add_assignment(guild_id: str, assignment_id: str, title: str, description: str, deadline: datetime, subject: str, file_paths: list, creator_id: str):
+    conn = get_db_connection()
     if conn is None:
         return False
+    cursor = None
     try:
         cursor = conn.cursor()
         cursor.execute(
             "INSERT INTO assignments (assignment_id, guild_id, title, description, deadline, subject, file_paths, creator_id) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
-            (assignment_id, guild_id, title, description, deadline, subject, json.dumps(file_paths), creator_id)
+            (assignment_id, guild_id, title, description, deadline, subject, json_dumps(file_paths), creator_id)
         )
         conn.commit()
+        bump_version(guild_id, "assignments")
         return True
     except Error as e:
         print(f"Error adding assignment: {e}")
         return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
-async def db_delete_assignment(guild_id: str, assignment_id: str):
-    conn = await get_db_connection()
+@run_in_thread
+def db_delete_assignment(guild_id: str, assignment_id: str):
+    conn = get_db_connection()
     if conn is None:
         return False
+    cursor = None
     try:
         cursor = conn.cursor()
         cursor.execute("DELETE FROM assignments WHERE guild_id = %s AND assignment_id = %s", (guild_id, assignment_id))
         conn.commit()
+        bump_version(guild_id, "assignments")
         return cursor.rowcount > 0
     except Error as e:
         print(f"Error deleting assignment: {e}")
         return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
-async def db_update_assignment_files(guild_id: str, assignment_id: str, file_paths: list):
-    conn = await get_db_connection()
+@run_in_thread
+def db_bulk_update_assignment_files(guild_id: str, updates: list[tuple[str, list]]):
+    # One connection and one commit for every (id, file_paths) pair
+    conn = get_db_connection()
     if conn is None:
         return False
+    cursor = None
     try:
         cursor = conn.cursor()
-        cursor.execute(
+        cursor.executemany(
             "UPDATE assignments SET file_paths = %s WHERE guild_id = %s AND assignment_id = %s",
-            (json.dumps(file_paths), guild_id, assignment_id)
+            [(json_dumps(file_paths), guild_id, row_id) for row_id, file_paths in updates]
         )
         conn.commit()
+        bump_version(guild_id, "assignments")
         return cursor.rowcount > 0
     except Error as e:
         print(f"Error updating assignment files: {e}")
         return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
+
+
+async def db_update_assignment_files(guild_id: str, assignment_id: str, file_paths: list):
+    return await db_bulk_update_assignment_files(guild_id, [(assignment_id, file_paths)])
 
 # ────────────────────────────────────────────────
 # DATABASE NOTES FUNCTIONS
 # ────────────────────────────────────────────────
-async def db_get_notes(guild_id: str):
-    conn = await get_db_connection()
+def _note_row(n: dict) -> dict:
+    return {
+        "note_id": n["note_id"],
+        "title": n["title"],
+        "subject": n["subject"],
+        "file_paths": json_loads(n["file_paths"]) if n["file_paths"] else [],
+        "creator_id": n["creator_id"],
+    }
+
+@run_in_thread
+def db_get_notes(guild_id: str):
+    conn = get_db_connection()
     if conn is None:
         return []
+    cursor = None
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT note_id, title, subject, file_paths, creator_id FROM notes WHERE guild_id = %s", (guild_id,))
-        notes_data = cursor.fetchall()
-        return [
-            {
-                "note_id": n["note_id"],
-                "title": n["title"],
-                "subject": n["subject"],
-                "file_paths": json.loads(n["file_paths"]) if n["file_paths"] else [],
-                "creator_id": n["creator_id"],
-            }
-            for n in notes_data
-        ]
+        cursor.execute(SQL_GET_NOTES, (guild_id,))
+        return [_note_row(n) for n in cursor.fetchall()]
     except Error as e:
         print(f"Error getting notes: {e}")
         return []
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
+
+@run_in_thread
+def db_get_note(guild_id: str, note_id: str):
+    conn = get_db_connection()
+    if conn is None:
+        return None
+    cursor = None
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(SQL_GET_NOTE, (guild_id, note_id))
+        row = cursor.fetchone()
+        return _note_row(row) if row else None
+    except Error as e:
+        print(f"Error getting note: {e}")
+        return None
+    finally:
+        close_quietly(cursor, conn)
 
 async def db_add_note(guild_id: str, note_id: str, title: str, subject: str, file_paths: list, creator_id: str):
-    conn = await get_db_connection()
+    added = await _db_insert_note(guild_id, note_id, title, subject, file_paths, creator_id)
+    if added:
+        index_note_subject(guild_id, subject)
+    return added
+
+@run_in_thread
+def _db_insert_note(guild_id: str, note_id: str, title: str, subject: str, file_paths: list, creator_id: str):
+    conn = get_db_connection()
     if conn is None:
         return False
+    cursor = None
     try:
         cursor = conn.cursor()
         cursor.execute(
             "INSERT INTO notes (note_id, guild_id, title, subject, file_paths, creator_id) VALUES (%s, %s, %s, %s, %s, %s)",
-            (note_id, guild_id, title, subject, json.dumps(file_paths), creator_id)
+            (note_id, guild_id, title, subject, json_dumps(file_paths), creator_id)
         )
         conn.commit()
+        bump_version(guild_id, "notes")
         return True
     except Error as e:
         print(f"Error adding note: {e}")
         return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
-async def db_update_note_files(guild_id: str, note_id: str, file_paths: list):
-    conn = await get_db_connection()
+@run_in_thread
+def db_bulk_update_note_files(guild_id: str, updates: list[tuple[str, list]]):
+    # One connection and one commit for every (id, file_paths) pair
+    conn = get_db_connection()
     if conn is None:
         return False
+    cursor = None
     try:
         cursor = conn.cursor()
-        cursor.execute(
+        cursor.executemany(
             "UPDATE notes SET file_paths = %s WHERE guild_id = %s AND note_id = %s",
-            (json.dumps(file_paths), guild_id, note_id)
+            [(json_dumps(file_paths), guild_id, row_id) for row_id, file_paths in updates]
         )
         conn.commit()
+        bump_version(guild_id, "notes")
         return cursor.rowcount > 0
     except Error as e:
         print(f"Error updating note files: {e}")
         return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
+
+
+async def db_update_note_files(guild_id: str, note_id: str, file_paths: list):
+    return await db_bulk_update_note_files(guild_id, [(note_id, file_paths)])
 
 # ────────────────────────────────────────────────
 # DATABASE REGISTRATIONS FUNCTIONS
 # ────────────────────────────────────────────────
 async def db_get_registration(username: str):
-    conn = await get_db_connection()
+    cached = _registration_cache.get(username, _MISSING)
+    if cached is not _MISSING:
+        return cached
+
+    reg_number = await _db_fetch_registration(username)
+    if reg_number is not _MISSING:
+        _registration_cache.set(username, reg_number)
+        return reg_number
+    return None
+
+@run_in_thread
+def _db_fetch_registration(username: str):
+    conn = get_db_connection()
     if conn is None:
-        return None
+        return _MISSING
+    cursor = None
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT reg_number FROM registrations WHERE username = %s", (username,))
+        cursor.execute(SQL_GET_REGISTRATION, (username,))
         result = cursor.fetchone()
         return result['reg_number'] if result else None
     except Error as e:
         print(f"Error getting registration for {username}: {e}")
-        return None
+        return _MISSING
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
 async def db_set_registration(username: str, reg_number: str):
-    conn = await get_db_connection()
+    success = await _db_store_registration(username, reg_number)
+    if success:
+        _registration_cache.set(username, reg_number)
+    return success
+
+@run_in_thread
+def _db_store_registration(username: str, reg_number: str):
+    conn = get_db_connection()
     if conn is None:
         return False
+    cursor = None
     try:
         cursor = conn.cursor()
         cursor.execute(
@@ -649,31 +1056,66 @@ async def db_set_registration(username: str, reg_number: str):
         print(f"Error setting registration for {username}: {e}")
         return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
 async def db_get_user_info(discord_id: str):
-    conn = await get_db_connection()
+    cached = _user_info_cache.get(discord_id, _MISSING)
+    if cached is not _MISSING:
+        return cached
+
+    user_info = await _db_fetch_user_info(discord_id)
+    if user_info is not _MISSING:
+        _user_info_cache.set(discord_id, user_info)
+        return user_info
+    return None
+
+@run_in_thread
+def _db_fetch_user_info(discord_id: str):
+    conn = get_db_connection()
     if conn is None:
-        return None
+        return _MISSING
+    cursor = None
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT discord_id, username, nickname, age, mood, hobbies, challenges, created_at FROM users_info WHERE discord_id = %s", (discord_id,))
+        cursor.execute(SQL_GET_USER_INFO, (discord_id,))
         result = cursor.fetchone()
         return result
     except Error as e:
         print(f"Error getting user info for {discord_id}: {e}")
-        return None
+        return _MISSING
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
 async def db_add_user_info(discord_id: str, username: str, nickname: str, age: int, mood: str, hobbies: str, challenges: str):
-    conn = await get_db_connection()
+    success = await _db_store_user_info(discord_id, username, nickname, age, mood, hobbies, challenges)
+    # Drop the cached "first-time user" None; the next read loads the row
+    _user_info_cache.pop(discord_id)
+    if success and known_users is not None:
+        known_users.add(discord_id)
+    return success
+
+@run_in_thread
+def db_load_known_users():
+    conn = get_db_connection()
+    if conn is None:
+        return None
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT discord_id FROM users_info")
+        return {row[0] for row in cursor.fetchall()}
+    except Error as e:
+        print(f"Error loading known users: {e}")
+        return None
+    finally:
+        close_quietly(cursor, conn)
+
+@run_in_thread
+def _db_store_user_info(discord_id: str, username: str, nickname: str, age: int, mood: str, hobbies: str, challenges: str):
+    conn = get_db_connection()
     if conn is None:
         return False
+    cursor = None
     try:
         cursor = conn.cursor()
         created_at = datetime.now()
@@ -687,17 +1129,17 @@ async def db_add_user_info(discord_id: str, username: str, nickname: str, age: i
         print(f"Error adding user info for {discord_id}: {e}")
         return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
-async def db_add_conversation(discord_id: str, user_message: str, bot_response: str):
-    conn = await get_db_connection()
+@run_in_thread
+def db_add_conversation(discord_id: str, user_message: str, bot_response: str):
+    conn = get_db_connection()
     if conn is None:
         return False
+    cursor = None
     try:
         cursor = conn.cursor()
-        conversation_id = str(uuid.uuid4())
+        conversation_id = secrets.token_hex(16)
         timestamp = datetime.now()
         cursor.execute(
             "INSERT INTO conversations (conversation_id, discord_id, timestamp, user_message, bot_response) VALUES (%s, %s, %s, %s, %s)",
@@ -709,14 +1151,14 @@ async def db_add_conversation(discord_id: str, user_message: str, bot_response:
         print(f"Error logging conversation for {discord_id}: {e}")
         return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
-async def db_get_conversation_history(discord_id: str, limit: int = 10):
-    conn = await get_db_connection()
+@run_in_thread
+def db_get_conversation_history(discord_id: str, limit: int = 10):
+    conn = get_db_connection()
     if conn is None:
         return []
+    cursor = None
     try:
         cursor = conn.cursor(dictionary=True)
         cursor.execute(
@@ -729,14 +1171,14 @@ async def db_get_conversation_history(discord_id: str, limit: int = 10):
         print(f"Error retrieving conversation history for {discord_id}: {e}")
         return []
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
-async def db_set_personality(discord_id: str, personality_id: str, personality_name: str):
-    conn = await get_db_connection()
+@run_in_thread
+def db_set_personality(discord_id: str, personality_id: str, personality_name: str):
+    conn = get_db_connection()
     if conn is None:
         return False
+    cursor = None
     try:
         cursor = conn.cursor()
         cursor.execute(
@@ -749,26 +1191,24 @@ async def db_set_personality(discord_id: str, personality_id: str, personality_n
         print(f"Error setting personality for {discord_id}: {e}")
         return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
-async def db_get_personality(discord_id: str):
-    conn = await get_db_connection()
+@run_in_thread
+def db_get_personality(discord_id: str):
+    conn = get_db_connection()
     if conn is None:
         return None
+    cursor = None
     try:
         cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT personality_id, personality_name FROM joi_personality WHERE discord_id = %s", (discord_id,))
+        cursor.execute(SQL_GET_PERSONALITY, (discord_id,))
         result = cursor.fetchone()
         return result
     except Error as e:
         print(f"Error getting personality for {discord_id}: {e}")
         return None
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
+        close_quietly(cursor, conn)
 
 
 # ────────────────────────────────────────────────
@@ -868,6 +1308,73 @@ JOI - EVERYTHING YOU WANT TO SEE, EVERYTHING YOU WANT TO HEAR
 LAB_MANUALS_DIR = Path("lab-manuals")
 LAB_MANUALS_DIR.mkdir(parents=True, exist_ok=True)
 
+_EXP_FILE_RE = re.compile(r'^exp(\d+)\.txt$')
+_SAFE_NAME_RE = re.compile(r'[^a-zA-Z0-9_-]')
+# Discord selects take at most 25 options
+SELECT_PAGE_SIZE = 25
+
+
+def paginate_options(options: list[SelectOption]) -> list[list[SelectOption]]:
+    return [options[i:i + SELECT_PAGE_SIZE] for i in range(0, len(options), SELECT_PAGE_SIZE)]
+
+
+# subject folder → (dir mtime_ns, option pages)
+_lab_index = {}
+_lab_subjects = None  # (LAB_MANUALS_DIR mtime_ns, option pages)
+
+
+def lab_subject_pages() -> list[list[SelectOption]]:
+    # Same mtime check as lab_experiment_pages: one stat per call, and a single
+    # scandir only after /add-lab-manual (or a manual edit) changed the root
+    global _lab_subjects
+    try:
+        mtime = os.stat(LAB_MANUALS_DIR).st_mtime_ns
+    except OSError:
+        return []
+    if _lab_subjects and _lab_subjects[0] == mtime:
+        return _lab_subjects[1]
+
+    with os.scandir(LAB_MANUALS_DIR) as entries:
+        subjects = sorted(e.name.replace('_', ' ') for e in entries if e.is_dir())
+    pages = paginate_options([SelectOption(label=s, value=s.replace(' ', '_')) for s in subjects])
+    _lab_subjects = (mtime, pages)
+    return pages
+
+
+def lab_experiment_pages(subject_path: Path) -> list[list[SelectOption]]:
+    # A directory's mtime changes whenever an entry is added, removed or
+    # renamed, so the listing is only rescanned when it can differ
+    try:
+        mtime = os.stat(subject_path).st_mtime_ns
+    except OSError:
+        return []
+    cached = _lab_index.get(subject_path.name)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    experiments = []
+    with os.scandir(subject_path) as entries:
+        for entry in entries:
+            m = _EXP_FILE_RE.match(entry.name)
+            if m:
+                experiments.append((int(m.group(1)), entry.name, entry.path))
+    experiments.sort()
+    pages = paginate_options([
+        SelectOption(label=f"Experiment {num} - {fname}", value=file_path)
+        for num, fname, file_path in experiments
+    ])
+    _lab_index[subject_path.name] = (mtime, pages)
+    return pages
+
+
+def read_head(path: Path, chars: int) -> tuple[str, bool]:
+    # UTF-8 is at most 4 bytes per character, so this many bytes always
+    # covers `chars` characters; one more tells us whether there is a tail
+    with open(path, 'rb') as f:
+        raw = f.read(chars * 4 + 1)
+    text = raw.decode("utf-8", errors="replace")
+    return text[:chars], len(text) > chars
+
 # ────────────────────────────────────────────────
 # BOT SETUP
 # ────────────────────────────────────────────────
@@ -877,13 +1384,34 @@ intents.message_content = True
 bot = commands.Bot(command_prefix="!", intents=intents, help_command=None)
 tree = bot.tree
 
+
+def defer_first(ephemeral: bool = False):
+    # Acknowledge before any DB await: a deferred interaction has 15 minutes
+    # instead of 3 seconds. The command then answers with followup.send.
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(interaction: discord.Interaction, *args, **kwargs):
+            await interaction.response.defer(ephemeral=ephemeral)
+            return await func(interaction, *args, **kwargs)
+        return wrapper
+    return decorator
+
 # ────────────────────────────────────────────────
 # FIREBASE SETUP
 # ────────────────────────────────────────────────
 SERVICE_ACCOUNT_PATH = 'aids-attendance-system-firebase-adminsdk.json'
-cred = credentials.Certificate(SERVICE_ACCOUNT_PATH)
-firebase_admin.initialize_app(cred)
-db = firestore.client()
+db = None  # Firestore client, created in setup_hook
+
+
+@functools.cache
+def firebase_credentials():
+    return credentials.Certificate(SERVICE_ACCOUNT_PATH)
+
+
+def init_firebase():
+    global db
+    firebase_admin.initialize_app(firebase_credentials())
+    db = firestore.client()
 
 students = [
     {"reg": '2117240070256', "name": 'Ritesh M S'},
@@ -894,6 +1422,7 @@ students = [
     {"reg": '2117240070306', "name": 'Shylendhar M'},
     {"reg": '2117240070308', "name": 'Sidharth P L'}
 ]
+students_by_reg = {s["reg"]: s for s in students}
 
 
 def get_attendance_data(reg):
@@ -930,12 +1459,10 @@ def get_attendance_data(reg):
     else:
         status = "Good Standing"
 
-    def fmt_date(d):
-        year, month, day = d.split('-')
-        return f"{day}-{month}-{year}"
-    abs_dates_fmt = [fmt_date(d) for d in sorted(abs_dates)]
-    int_dates_fmt = [fmt_date(d) for d in sorted(int_dates)]
-    ext_dates_fmt = [fmt_date(d) for d in sorted(ext_dates)]
+    # Doc IDs are YYYY-MM-DD; slice straight into DD-MM-YYYY
+    abs_dates_fmt = [f"{d[8:10]}-{d[5:7]}-{d[0:4]}" for d in sorted(abs_dates)]
+    int_dates_fmt = [f"{d[8:10]}-{d[5:7]}-{d[0:4]}" for d in sorted(int_dates)]
+    ext_dates_fmt = [f"{d[8:10]}-{d[5:7]}-{d[0:4]}" for d in sorted(ext_dates)]
     return {
         "total": total,
         "present": present,
@@ -950,6 +1477,23 @@ def get_attendance_data(reg):
     }
 
 
+# reg → attendance dict; class-time bursts share one Firestore read per reg
+_attendance_cache = TTLCache(maxsize=2000, ttl=90)
+_attendance_locks = {}  # reg → asyncio.Lock
+
+
+async def cached_attendance(reg: str) -> dict:
+    attendance = _attendance_cache.get(reg)
+    if attendance is not None:
+        return attendance
+    async with _attendance_locks.setdefault(reg, asyncio.Lock()):
+        attendance = _attendance_cache.get(reg)
+        if attendance is None:
+            attendance = await asyncio.to_thread(get_attendance_data, reg)
+            _attendance_cache.set(reg, attendance)
+        return attendance
+
+
 # YTDLSource for playing audio
 yt_dlp.utils.DEFAULT_OUTTMPL = '%(extractor)s-%(id)s-%(title)s.%(ext)s'
 
@@ -996,13 +1540,80 @@ class YTDLSource(discord.PCMVolumeTransformer):
 # ────────────────────────────────────────────────
 # EVENT & CALL & REMINDER GLOBALS
 # ────────────────────────────────────────────────
-active_reminders = {}
-scheduled_tasks = {}
-
-active_calls = {}
-scheduled_call_tasks = {}
-
-scheduled_reminder_tasks = {}   # ← NEW
+active_reminders = {}           # (guild_id, event_id) → ReminderData
+scheduled_tasks = {}            # (guild_id, event_id) → TimerHandle, then Task once pinging
+EVENT_RETRY_SECONDS = 30
+MAX_EVENT_PINGS = 20            # gives up after ~10 minutes of nobody answering
+# (guild id, user id) as ints → {(guild_id, event_id), ...} the user is still
+# being pinged for in that guild, so a bot mention only touches its own
+# events. Int keys let on_message probe with the raw snowflakes it already has
+reminded_users = {}
+
+active_calls = {}               # (guild_id, call_id) → ActiveCall
+scheduled_call_tasks = {}       # (guild_id, call_id) → Task
+CALL_RETRY_SECONDS = 2
+
+scheduled_reminder_tasks = {}   # (guild_id, reminder_id) → TimerHandle, then Task once firing
+schedules_restored = False      # pending events/reminders reloaded from the DB this run
+
+
+@dataclass(slots=True)
+class ReminderData:
+    remaining: set[str]  # user ids still to be pinged
+    channel: discord.abc.Messageable
+    title: str
+
+
+@dataclass(slots=True)
+class ActiveCall:
+    remaining: set[str]  # user ids still to be pinged
+    channel: discord.abc.Messageable
+    message: str
+    wake: asyncio.Event  # set by /stop-calling after editing `remaining`
+
+EVENT_PING_TEMPLATE = "Reminder for event '{title}': It's time! {mentions}"
+CALL_ALERT_TEMPLATE = "📞 **CALL ALERT** 📞 {message}\n{mentions}"
+REMINDER_FIRE_TEMPLATE = "🔔 **Reminder!** 🔔\n**{title}**\n||@everyone||"
+EVENT_SCHEDULED_TEMPLATE = "**{title}** scheduled for **{when}**"
+REMINDER_SCHEDULED_TEMPLATE = "Reminder '**{title}**' scheduled for **{when}**"
+TODO_REMOVED_TEMPLATE = "🗑️ Task completed / removed:\n**{text}**"
+
+_MENTION_RE = re.compile(r'<@!?(\d+)>')
+
+# Discord rejects content over 2000 characters with a 400; mentions are also
+# capped at 100 per message, but ~21-char snowflake mentions hit the length
+# limit first. Batches are bounded by both.
+MAX_MESSAGE_LENGTH = 2000
+MAX_MENTIONS_PER_MESSAGE = 100
+MAX_MENTION_LENGTH = 23  # "<@" + up to 20 digits + ">"
+
+
+def _mention_chunk(content: str, batch: list) -> tuple[str, discord.AllowedMentions]:
+    # Only the users in this batch can be pinged, never @everyone or roles
+    # from the free-text part
+    return content, discord.AllowedMentions(
+        everyone=False, roles=False,
+        users=[discord.Object(id=int(uid)) for uid in batch])
+
+
+def chunk_mentions(header: str, user_ids) -> list[tuple[str, discord.AllowedMentions]]:
+    # (content, allowed_mentions) per message: `header` followed by as many
+    # mentions as fit in MAX_MESSAGE_LENGTH and MAX_MENTIONS_PER_MESSAGE.
+    # An oversized header is cut so there is always room for one mention.
+    header = header[:MAX_MESSAGE_LENGTH - MAX_MENTION_LENGTH]
+    chunks = []
+    batch, content = [], header
+    for uid in user_ids:
+        mention = f"<@{uid}>"
+        if batch and (len(content) + 1 + len(mention) > MAX_MESSAGE_LENGTH
+                      or len(batch) == MAX_MENTIONS_PER_MESSAGE):
+            chunks.append(_mention_chunk(content, batch))
+            batch, content = [], header
+        content += f" {mention}" if batch else mention
+        batch.append(uid)
+    if batch:
+        chunks.append(_mention_chunk(content, batch))
+    return chunks
 
 # Music queue & player state per guild
 # guild_id → list of {'title': str, 'url': str, 'requester': str, 'source': YTDLSource}
@@ -1013,123 +1624,391 @@ music_messages = {}
 music_views = {}            # guild_id → current MusicControlView instance
 
 
-def schedule_spam(guild_id: str, event_id: str, event: dict):
-    async def inner():
+# Discord allows roughly 5 messages per 5 seconds per channel; wait before
+# sending instead of finding out from a 429
+SEND_RATE = 5
+SEND_PER_SECONDS = 5.0
+
+
+class SendLimiter:
+    __slots__ = ('sent', 'lock')
+
+    def __init__(self):
+        self.sent = deque(maxlen=SEND_RATE)  # loop times of the last sends
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            loop = asyncio.get_running_loop()
+            if len(self.sent) == SEND_RATE:
+                wait = self.sent[0] + SEND_PER_SECONDS - loop.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            self.sent.append(loop.time())
+
+
+_send_limiters = {}  # channel id → SendLimiter
+
+
+async def paced_send(channel, *args, **kwargs):
+    limiter = _send_limiters.get(channel.id)
+    if limiter is None:
+        limiter = _send_limiters[channel.id] = SendLimiter()
+    await limiter.acquire()
+    return await channel.send(*args, **kwargs)
+
+
+def index_reminder_users(key: tuple, user_ids):
+    guild_id = int(key[0])
+    for uid in user_ids:
+        reminded_users.setdefault((guild_id, int(uid)), set()).add(key)
+
+
+def unindex_reminder_user(key: tuple, user_id: str):
+    user_key = (int(key[0]), int(user_id))
+    keys = reminded_users.get(user_key)
+    if keys is not None:
+        keys.discard(key)
+        if not keys:
+            del reminded_users[user_key]
+
+
+# channel_id → channel fetched over the API; discord.py doesn't keep those
+# in its own cache, so without this every fire for them is another fetch
+_fetched_channels = TTLCache(maxsize=512, ttl=3600)
+
+
+async def resolve_channel(channel_id: int):
+    # Cache hit first; fall back to an API fetch for channels not cached yet
+    channel = bot.get_channel(channel_id)
+    if channel is None and channel_id is not None:
+        channel = _fetched_channels.get(channel_id)
+        if channel is None:
+            try:
+                channel = await bot.fetch_channel(channel_id)
+            except discord.HTTPException:
+                return None
+            _fetched_channels.set(channel_id, channel)
+    return channel
+
+
+def open_existing_files(file_paths: list[str]) -> list[discord.File]:
+    # One scandir per directory instead of a stat per path; the handles are
+    # opened here so discord.File doesn't go back to the filesystem
+    existing = {}
+    for parent in {Path(path).parent for path in file_paths}:
         try:
-            dt = datetime.fromisoformat(event['datetime'])
-            now = datetime.now()
-            if dt <= now:
-                return
-            await asyncio.sleep((dt - now).total_seconds())
+            with os.scandir(parent) as entries:
+                existing[parent] = {e.name for e in entries if e.is_file()}
+        except OSError:
+            existing[parent] = set()
+
+    files = []
+    for path in file_paths:
+        p = Path(path)
+        if p.name in existing[p.parent]:
+            try:
+                files.append(discord.File(open(p, 'rb'), filename=p.name))
+            except OSError:
+                pass
+    return files
 
-            channel = bot.get_channel(event['channel_id'])
-            if not channel:
-                return
 
-            active_reminders.setdefault(guild_id, {})[event_id] = {
-                'remaining': event['members'][:],
-                'channel': channel,
-                'title': event['title']
-            }
+# Directories already created (or found) this run; skips the mkdir syscall
+_ensured_dirs = {LAB_MANUALS_DIR}
 
-            while len(active_reminders[guild_id][event_id]['remaining']) > 0:
-                remaining = active_reminders[guild_id][event_id]['remaining']
-                mentions = ' '.join(f"<@{uid}>" for uid in remaining)
-                await channel.send(f"Reminder for event '{event['title']}': It's time! {mentions}")
-                await asyncio.sleep(3)
 
-            active_reminders[guild_id].pop(event_id, None)
-            if not active_reminders[guild_id]:
-                active_reminders.pop(guild_id, None)
+async def ensure_dir(path: Path):
+    if path in _ensured_dirs:
+        return
+    await asyncio.to_thread(path.mkdir, parents=True, exist_ok=True)
+    _ensured_dirs.add(path)
 
-        except asyncio.CancelledError:
-            pass
-        except Exception as e:
-            print(f"Reminder error for {event_id}: {e}")
+
+def _move_one(temp_path: Path, new_path: Path) -> str | None:
+    # os.replace is atomic on the same filesystem; shutil.move covers temp
+    # dirs on another device. A temp file that has vanished is skipped.
+    try:
+        os.replace(temp_path, new_path)
+    except FileNotFoundError:
+        return None
+    except OSError:
+        shutil.move(temp_path, new_path)
+    return str(new_path)
+
+
+async def move_temps(temp_paths: list[str], assets_dir: Path) -> list[str]:
+    await ensure_dir(assets_dir)
+    moved = await asyncio.gather(*(
+        asyncio.to_thread(_move_one, Path(p), assets_dir / Path(p).name)
+        for p in temp_paths
+    ))
+    return [p for p in moved if p is not None]
+
+
+def _write_all(files: list[tuple[str, bytes]], assets_dir: Path) -> list[str]:
+    paths = []
+    for filename, data in files:
+        path = assets_dir / Path(filename).name
+        path.write_bytes(data)
+        paths.append(str(path))
+    return paths
+
+
+async def write_files(files: list[tuple[str, bytes]], assets_dir: Path) -> list[str]:
+    # Bodies already in memory go straight to their final directory
+    if not files:
+        return []
+    await ensure_dir(assets_dir)
+    return await asyncio.to_thread(_write_all, files, assets_dir)
+
+
+def _move_all(files: list[tuple[str, Path]], assets_dir: Path) -> list[str]:
+    paths = []
+    for filename, spooled in files:
+        path = assets_dir / Path(filename).name
+        os.replace(spooled, path)
+        paths.append(str(path))
+    return paths
+
+
+async def move_files(files: list[tuple[str, Path]], assets_dir: Path) -> list[str]:
+    # Spooled uploads are renamed into place: same filesystem, no copy
+    if not files:
+        return []
+    await ensure_dir(assets_dir)
+    return await asyncio.to_thread(_move_all, files, assets_dir)
+
+
+def _unlink_all(files: list[tuple[str, Path]]):
+    for _, spooled in files:
+        spooled.unlink(missing_ok=True)
+
+
+async def guarded(coro, registry: dict, key: tuple, label: str):
+    # Shared wrapper for the schedule_* bodies: cancelling is a normal stop,
+    # anything else is logged, and the registry entry is dropped unless a
+    # newer task has already taken its key
+    try:
+        await coro
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        print(f"{label} {key[1]}: {e}")
+    finally:
+        if registry.get(key) is asyncio.current_task():
+            registry.pop(key, None)
+
+
+def start_guarded(coro, registry: dict, key: tuple, label: str) -> asyncio.Task:
+    task = asyncio.create_task(guarded(coro, registry, key, label))
+    # Under the eager task factory a body with nothing to wait for has
+    # already finished here; don't register it
+    if not task.done():
+        registry[key] = task
+    return task
+
+
+# Strong references to fire-and-forget tasks: the loop only keeps weak ones
+_background_tasks = set()
+
+
+def _log_background_failure(task: asyncio.Task):
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"Background task {task.get_name()} failed: {task.exception()}")
+
+
+def spawn(coro, name: str = None) -> asyncio.Task:
+    task = asyncio.create_task(coro, name=name)
+    _background_tasks.add(task)
+    task.add_done_callback(_log_background_failure)
+    return task
+
+
+async def save_attachments(attachments: list[discord.Attachment], temp_dir: Path) -> list[str]:
+    # Independent CDN downloads: fetch them together into memory, then write
+    # the ones that worked in a single thread hop
+    results = await asyncio.gather(
+        *(att.read() for att in attachments),
+        return_exceptions=True
+    )
+    files = []
+    for att, result in zip(attachments, results):
+        if isinstance(result, Exception):
+            print(f"Attachment download failed for {att.filename}: {result}")
+        else:
+            files.append((att.filename, result))
+    return await write_files(files, temp_dir)
+
+
+def evict_oldest_reminder():
+    # active_reminders is insertion-ordered: the first key has pinged longest
+    key, data = next(iter(active_reminders.items()))
+    print(f"Too many active reminders; stopping event {key[1]}")
+    del active_reminders[key]
+    for uid in data.remaining:
+        unindex_reminder_user(key, uid)
+    task = scheduled_tasks.pop(key, None)
+    if task:
+        task.cancel()
+
+
+SCHEDULE_SWEEP_SECONDS = 600
+
+
+async def sweep_schedules():
+    # Backstop for entries the normal finally/pop paths missed: finished
+    # tasks, cancelled handles, and pinging events whose task is gone
+    while True:
+        await asyncio.sleep(SCHEDULE_SWEEP_SECONDS)
+        for registry in (scheduled_tasks, scheduled_call_tasks, scheduled_reminder_tasks):
+            for key in [k for k, t in registry.items()
+                        if (t.done() if isinstance(t, asyncio.Task) else t.cancelled())]:
+                del registry[key]
+        for key in [k for k in active_reminders if k not in scheduled_tasks]:
+            data = active_reminders.pop(key)
+            for uid in data.remaining:
+                unindex_reminder_user(key, uid)
+
+
+def schedule_spam(guild_id: str, event_id: str, event: dict):
+    guild_id = sys.intern(guild_id)  # shared by every registry key for this guild
+    # Wall clock only for this one subtraction; call_later then counts on the
+    # loop's monotonic clock, so suspends and clock changes don't skew it
+    delay = (event['datetime_obj'] - datetime.now()).total_seconds()
+    if delay <= 0:
+        return
+
+    # Resolved once when scheduling instead of on every fire
+    channel = bot.get_channel(event['channel_id'])
+    key = (guild_id, event_id)
+
+    async def inner():
+        nonlocal channel
+        if channel is None:
+            channel = await resolve_channel(event['channel_id'])
+        if not channel:
+            return
+
+        remaining = set(event['members'])
+        if len(active_reminders) >= MAX_ACTIVE_REMINDERS:
+            evict_oldest_reminder()
+        active_reminders[key] = ReminderData(remaining=remaining, channel=channel, title=event['title'])
+        index_reminder_users(key, remaining)
+
+        try:
+            # `remaining` only shrinks, so the batches are rebuilt when its
+            # size changes rather than on every ping
+            built_for = -1
+            for _ in range(MAX_EVENT_PINGS):
+                if not remaining:
+                    break
+                if len(remaining) != built_for:
+                    batches = chunk_mentions(
+                        EVENT_PING_TEMPLATE.format(title=event['title'], mentions=""), remaining)
+                    built_for = len(remaining)
+                for content, allowed in batches:
+                    await paced_send(channel, content, allowed_mentions=allowed)
+                await asyncio.sleep(EVENT_RETRY_SECONDS)
         finally:
-            scheduled_tasks.get(guild_id, {}).pop(event_id, None)
+            # Also on cancel (/delete-event, /stop-reminder) or a send error
+            for uid in remaining:
+                unindex_reminder_user(key, uid)
+            active_reminders.pop(key, None)
+
+    # Same as schedule_reminder: only a TimerHandle waits until the event;
+    # the ping loop's coroutine is created when it fires
+    def fire():
+        scheduled_tasks.pop(key, None)
+        start_guarded(inner(), scheduled_tasks, key, "Reminder error for")
 
-    task = asyncio.create_task(inner())
-    scheduled_tasks.setdefault(guild_id, {})[event_id] = task
+    scheduled_tasks[key] = asyncio.get_running_loop().call_later(delay, fire)
 
 
 def schedule_call(guild_id: str, call_id: str, call_data: dict):
+    guild_id = sys.intern(guild_id)
     async def inner():
-        try:
-            await asyncio.sleep(call_data['delay_minutes'] * 60)
+        await asyncio.sleep(call_data['delay_minutes'] * 60)
 
-            channel = bot.get_channel(call_data['channel_id'])
-            if not channel:
-                return
+        channel = await resolve_channel(call_data['channel_id'])
+        if not channel:
+            return
 
-            active_calls.setdefault(guild_id, {})[call_id] = {
-                'remaining': call_data['members'][:],
-                'channel': channel,
-                'message': call_data.get('message', 'Urgent Call')
-            }
+        remaining = set(call_data['members'])
+        wake = asyncio.Event()
+        active_calls[(guild_id, call_id)] = ActiveCall(
+            remaining=remaining,
+            channel=channel,
+            message=call_data.get('message', 'Urgent Call'),
+            wake=wake
+        )
 
-            while len(active_calls[guild_id][call_id]['remaining']) > 0:
-                remaining = active_calls[guild_id][call_id]['remaining']
-                mentions = ' '.join(f"<@{uid}>" for uid in remaining)
-                await channel.send(f"📞 **CALL ALERT** 📞 {call_data.get('message', '')}\n{mentions}")
-                await asyncio.sleep(2)
+        loop = asyncio.get_running_loop()
+        message = call_data.get('message', '')
+        dirty = True
+        while remaining:
+            if dirty:
+                batches = chunk_mentions(
+                    CALL_ALERT_TEMPLATE.format(message=message, mentions=""), remaining)
+                dirty = False
+            for content, allowed in batches:
+                await paced_send(channel, content, allowed_mentions=allowed)
+
+            # /stop-calling sets `wake` after editing `remaining`: leave as
+            # soon as nobody is left, otherwise keep the retry pacing and
+            # rebuild the mentions before the next ping
+            deadline = loop.time() + CALL_RETRY_SECONDS
+            while remaining and (left := deadline - loop.time()) > 0:
+                try:
+                    await asyncio.wait_for(wake.wait(), timeout=left)
+                except asyncio.TimeoutError:
+                    break
+                wake.clear()
+                dirty = True
 
-            active_calls[guild_id].pop(call_id, None)
-            if not active_calls[guild_id]:
-                active_calls.pop(guild_id, None)
+        active_calls.pop((guild_id, call_id), None)
 
-        except asyncio.CancelledError:
-            pass
-        except Exception as e:
-            print(f"Call spam error for {call_id}: {e}")
-        finally:
-            scheduled_call_tasks.get(guild_id, {}).pop(call_id, None)
+    start_guarded(inner(), scheduled_call_tasks, (guild_id, call_id), "Call spam error for")
 
-    task = asyncio.create_task(inner())
-    scheduled_call_tasks.setdefault(guild_id, {})[call_id] = task
 
+async def fire_reminder(guild_id: str, reminder_id: str):
+    # Re-read at fire time so edits made while it was pending are honoured
+    reminder = await db_get_reminder(guild_id, reminder_id)
+    if reminder is None:
+        return
 
-def schedule_reminder(guild_id: str, reminder_id: str, reminder: dict):
-    async def inner():
-        try:
-            dt = datetime.fromisoformat(reminder['datetime'])
-            now = datetime.now()
-            if dt <= now:
-                return
+    channel = await resolve_channel(reminder['channel_id'])
+    if not channel:
+        return
 
-            delay = (dt - now).total_seconds()
-            if delay > 0:
-                await asyncio.sleep(delay)
+    await paced_send(channel, REMINDER_FIRE_TEMPLATE.format(title=reminder['title']))
 
-            channel = bot.get_channel(reminder['channel_id'])
-            if not channel:
-                return
+    # Delete the reminder from the database
+    await db_delete_reminder(guild_id, reminder_id)
 
-            await channel.send(
-                f"🔔 **Reminder!** 🔔\n"
-                f"**{reminder['title']}**\n"
-                f"||@everyone||"
-            )
 
-            # Clean up after firing
-            if guild_id in scheduled_reminder_tasks and reminder_id in scheduled_reminder_tasks[guild_id]:
-                scheduled_reminder_tasks[guild_id].pop(reminder_id, None)
+def schedule_reminder(guild_id: str, reminder_id: str, reminder: dict):
+    guild_id = sys.intern(guild_id)
+    delay = (reminder['datetime_obj'] - datetime.now()).total_seconds()
+    if delay <= 0:
+        return
 
-            # Delete the reminder from the database
-            await db_delete_reminder(guild_id, reminder_id)
+    # Reminders can be days out: park a TimerHandle rather than a Task
+    # sleeping on a live coroutine frame. On fire the handle is replaced by
+    # the send task; .cancel() works on either.
+    key = (guild_id, reminder_id)
 
-        except asyncio.CancelledError:
-            pass
-        except Exception as e:
-            print(f"Reminder error {reminder_id}: {e}")
-        finally:
-            scheduled_reminder_tasks.get(guild_id, {}).pop(reminder_id, None)
+    def fire():
+        scheduled_reminder_tasks.pop(key, None)  # the spent handle
+        start_guarded(fire_reminder(guild_id, reminder_id), scheduled_reminder_tasks, key, "Reminder error")
+
+    scheduled_reminder_tasks[key] = asyncio.get_running_loop().call_later(delay, fire)
 
-            task = asyncio.create_task(inner())
-            scheduled_reminder_tasks.setdefault(guild_id, {})[reminder_id] = task
-        
-        # ────────────────────────────────────────────────
-        # TODO MODAL# ────────────────────────────────────────────────
+
+# ────────────────────────────────────────────────
+# TODO MODAL
+# ────────────────────────────────────────────────
 
 class TodoCreateModal(ui.Modal, title="Add New Todo Task"):
     task_description = ui.TextInput(
@@ -1146,7 +2025,7 @@ class TodoCreateModal(ui.Modal, title="Add New Todo Task"):
             return
 
         guild_id = str(interaction.guild_id)
-        task_id = str(uuid.uuid4())
+        task_id = secrets.token_hex(16)
         created_by = str(interaction.user.id)
         created_at = datetime.now()
 
@@ -1202,20 +2081,22 @@ class UserInfoModal(ui.Modal, title="Tell me about yourself!"):
 # ────────────────────────────────────────────────
 
 class TodoSelectView(ui.View):
-    def __init__(self, todo_list: list[tuple[str, dict]]):
+    @staticmethod
+    def build_option(tid: str, data: dict) -> SelectOption:
+        label = data["text"][:80]
+        if len(data["text"]) > 80:
+            label += "..."
+        return SelectOption(
+            label=label,
+            value=tid,
+            description=f"Added by <@{data['created_by']}>"
+        )
+
+    def __init__(self, todo_list: list[tuple[str, dict]], guild_id: str = None, rows_version: int = -1):
         super().__init__(timeout=180.0)
-        self.todo_list = todo_list
+        self.todo_list = dict(todo_list)
 
-        options = []
-        for tid, data in todo_list:
-            label = data["text"][:80]
-            if len(data["text"]) > 80:
-                label += "..."
-            options.append(SelectOption(
-                label=label,
-                value=tid,
-                description=f"Added by <@{data['created_by']}>"
-            ))
+        options = cached_select_options(guild_id, "todos", "select", todo_list, self.build_option, rows_version)
 
         if not options:
             self.clear_items()
@@ -1235,13 +2116,9 @@ class TodoSelectView(ui.View):
         guild_id = str(interaction.guild_id)
 
         # Retrieve the task text before deleting for the response message
-        todos = await db_get_todos(guild_id)
-        task_text = ""
-        for tid, data in self.todo_list:
-            if tid == selected_id:
-                task_text = data["text"]
-                break
-        
+        todo = self.todo_list.get(selected_id)
+        task_text = todo["text"] if todo else ""
+
         success = await db_delete_todo(guild_id, selected_id)
 
         if not success:
@@ -1249,7 +2126,7 @@ class TodoSelectView(ui.View):
             return
 
         await interaction.response.edit_message(
-            content=f"🗑️ Task completed / removed:\n**{task_text}**",
+            content=TODO_REMOVED_TEMPLATE.format(text=task_text),
             view=None
         )
 
@@ -1317,7 +2194,7 @@ class MusicControlView(ui.View):
                         embed=None,
                         view=None
                     )
-                except:
+                except discord.HTTPException:
                     pass
 
     @ui.button(label="⏪ -10s", style=discord.ButtonStyle.grey)
@@ -1340,48 +2217,50 @@ class MusicControlView(ui.View):
 # EVENT VIEWS
 # ────────────────────────────────────────────────
 
+_HOUR_OPTIONS = tuple(SelectOption(label=f"{h:02d}", value=f"{h:02d}") for h in range(24))
+_MINUTE_OPTIONS = tuple(SelectOption(label=m, value=m) for m in ("00", "10", "20", "30", "40", "50"))
+
+
+@functools.lru_cache(maxsize=2)  # one entry each for the 7- and 10-day pickers
+def _date_options(today_ordinal: int, days: int) -> tuple[SelectOption, ...]:
+    today = date.fromordinal(today_ordinal)
+    return tuple(
+        SelectOption(label=d.strftime("%Y-%m-%d (%A)"), value=d.isoformat())
+        for d in (today + timedelta(days=i) for i in range(days))
+    )
+
+
 class EventScheduleView(ui.View):
-    def __init__(self, event_id: str, title: str):
+    def __init__(self, event_id: str, title: str, members: list[str]):
         super().__init__(timeout=600.0)
         self.event_id = event_id
         self.title = title
+        self.members = members
         self.selected_date = None
         self.selected_hour = None
         self.selected_minute = None
 
-        now = datetime.now()
-        date_options = []
-        for i in range(7):
-            d = now + timedelta(days=i)
-            label = d.strftime("%Y-%m-%d (%A)")
-            date_options.append(SelectOption(
-                label=label, value=d.strftime("%Y-%m-%d")))
-
         self.date_select = ui.Select(
             placeholder="Select date",
-            options=date_options,
+            options=list(_date_options(date.today().toordinal(), 7)),
             min_values=1,
             max_values=1
         )
         self.date_select.callback = self.date_callback
         self.add_item(self.date_select)
 
-        hour_options = [SelectOption(
-            label=f"{h:02d}", value=f"{h:02d}") for h in range(24)]
         self.hour_select = ui.Select(
             placeholder="Hour (00-23)",
-            options=hour_options,
+            options=list(_HOUR_OPTIONS),
             min_values=1,
             max_values=1
         )
         self.hour_select.callback = self.time_callback
         self.add_item(self.hour_select)
 
-        minute_options = [SelectOption(label=m, value=m) for m in [
-            "00", "10", "20", "30", "40", "50"]]
         self.minute_select = ui.Select(
             placeholder="Minute",
-            options=minute_options,
+            options=list(_MINUTE_OPTIONS),
             min_values=1,
             max_values=1
         )
@@ -1417,14 +2296,11 @@ class EventScheduleView(ui.View):
         if not (self.selected_date and self.selected_hour and self.selected_minute):
             return
 
-        dt_str = f"{self.selected_date} {self.selected_hour}:{self.selected_minute}:00"
-        try:
-            dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M:%S")
-            if dt <= datetime.now():
-                await interaction.response.send_message("Event must be in the future.", ephemeral=True)
-                return
-        except ValueError:
-            await interaction.response.send_message("Invalid date/time.", ephemeral=True)
+        # Select values are our own zero-padded options, so build directly
+        y, m, d = map(int, self.selected_date.split('-'))
+        dt = datetime(y, m, d, int(self.selected_hour), int(self.selected_minute))
+        if dt <= datetime.now():
+            await interaction.response.send_message("Event must be in the future.", ephemeral=True)
             return
 
         # Use db_update_event_datetime to update the event in the database
@@ -1439,38 +2315,37 @@ class EventScheduleView(ui.View):
             await interaction.response.send_message("Failed to schedule event. Please try again.", ephemeral=True)
             return
 
-        # Fetch the updated event data to pass to schedule_spam
-        events_data = await db_get_events(str(interaction.guild_id))
-        event = next((e for e in events_data if e["event_id"] == self.event_id), None)
-
-        if event:
-            schedule_spam(str(interaction.guild_id), self.event_id, event)
-        else:
-            await interaction.response.send_message("Event not found after update, scheduling failed.", ephemeral=True)
-            return
+        # Everything schedule_spam needs is already known here; no re-read
+        event = {
+            "event_id": self.event_id,
+            "title": self.title,
+            "members": self.members,
+            "datetime": dt.isoformat(),
+            "datetime_obj": dt,
+            "datetime_display": dt.strftime("%Y-%m-%d %H:%M"),
+            "channel_id": interaction.channel_id,
+        }
+        schedule_spam(str(interaction.guild_id), self.event_id, event)
 
         await interaction.response.edit_message(
-            content=f"**{self.title}** scheduled for **{dt.strftime('%Y-%m-%d %I:%M %p')}**",
+            content=EVENT_SCHEDULED_TEMPLATE.format(title=self.title, when=dt.strftime('%Y-%m-%d %I:%M %p')),
             view=None
         )
 
 
 class EventSelectView(ui.View):
-    def __init__(self, events_list: list[tuple[str, dict]], action: str):
+    @staticmethod
+    def build_option(eid: str, data: dict) -> SelectOption:
+        when = data.get('datetime_display')
+        label = f"{data['title']} ({eid[:8]}) - {when}" if when else f"{data['title']} ({eid[:8]})"
+        return SelectOption(label=label[:100], value=eid)
+
+    def __init__(self, events_list: Iterable[tuple[str, dict]], action: str, guild_id: str = None, rows_version: int = -1):
         super().__init__(timeout=180.0)
-        self.events_list = events_list
+        self._by_id = dict(events_list)
         self.action = action
 
-        options = []
-        for eid, data in events_list:
-            label = f"{data['title']} ({eid[:8]})"
-            if 'datetime' in data and data['datetime']:
-                try:
-                    dt = datetime.fromisoformat(data['datetime'])
-                    label += f" - {dt.strftime('%Y-%m-%d %H:%M')}"
-                except:
-                    pass
-            options.append(SelectOption(label=label[:100], value=eid))
+        options = cached_select_options(guild_id, "events", "select", self._by_id.items(), self.build_option, rows_version)
 
         self.select = ui.Select(
             placeholder=f"Select event to {action.replace('_', ' ')}...",
@@ -1485,7 +2360,7 @@ class EventSelectView(ui.View):
         selected_id = self.select.values[0]
         guild_id = str(interaction.guild_id)
 
-        event = next((e for eid, e in self.events_list if eid == selected_id), None)
+        event = self._by_id.get(selected_id)
 
         if not event:
             await interaction.response.send_message("Event not found.", ephemeral=True)
@@ -1499,9 +2374,9 @@ class EventSelectView(ui.View):
                 await interaction.response.send_message("Failed to delete event. Please try again.", ephemeral=True)
                 return
 
-            if guild_id in scheduled_tasks and selected_id in scheduled_tasks[guild_id]:
-                scheduled_tasks[guild_id][selected_id].cancel()
-                del scheduled_tasks[guild_id][selected_id]
+            task = scheduled_tasks.pop((guild_id, selected_id), None)
+            if task:
+                task.cancel()
 
             await interaction.response.send_message(f"Deleted event: **{title}**", ephemeral=True)
 
@@ -1509,7 +2384,7 @@ class EventSelectView(ui.View):
             await interaction.response.send_message(
                 f"Selected for edit: **{title}** (ID: {selected_id[:8]})\n"
                 f"Members: {', '.join(f'<@{mid}>' for mid in event['members'])}\n"
-                f"Scheduled: {datetime.fromisoformat(event['datetime']).strftime('%Y-%m-%d %I:%M %p') if event['datetime'] else 'Not scheduled'}\n"
+                f"Scheduled: {event['datetime_obj'].strftime('%Y-%m-%d %I:%M %p') if event['datetime_obj'] else 'Not scheduled'}\n"
                 "(Full edit functionality can be added later)",
                 ephemeral=True
             )
@@ -1520,25 +2395,16 @@ class EventSelectView(ui.View):
 # ────────────────────────────────────────────────
 
 class ReminderDateView(ui.View):
-    def __init__(self, reminder_id: str, title: str):
+    def __init__(self, reminder_id: str, title: str, insert_task: asyncio.Task):
         super().__init__(timeout=600.0)
         self.reminder_id = reminder_id
         self.title = title
+        self.insert_task = insert_task  # placeholder row insert from /set-reminder
         self.selected_date = None
 
-        now = datetime.now()
-        date_options = []
-        for i in range(10):
-            d = now + timedelta(days=i)
-            label = d.strftime("%Y-%m-%d (%A)")
-            date_options.append(SelectOption(
-                label=label,
-                value=d.strftime("%Y-%m-%d")
-            ))
-
         self.date_select = ui.Select(
             placeholder="Select reminder date (fires at 8:00 PM IST)",
-            options=date_options,
+            options=list(_date_options(date.today().toordinal(), 10)),
             min_values=1,
             max_values=1
         )
@@ -1562,14 +2428,15 @@ class ReminderDateView(ui.View):
         if not self.selected_date:
             return
 
-        dt_str = f"{self.selected_date} 20:00:00"
-        try:
-            dt = datetime.strptime(dt_str, "%Y-%m-%d %H:%M:%S")
-            if dt <= datetime.now():
-                await interaction.response.send_message("Selected date is in the past.", ephemeral=True)
-                return
-        except ValueError:
-            await interaction.response.send_message("Invalid date.", ephemeral=True)
+        y, m, d = map(int, self.selected_date.split('-'))
+        dt = datetime(y, m, d, 20, 0)
+        if dt <= datetime.now():
+            await interaction.response.send_message("Selected date is in the past.", ephemeral=True)
+            return
+
+        # The update needs the placeholder row to exist first
+        if not await self.insert_task:
+            await interaction.response.send_message("Failed to create reminder. Please try again.", ephemeral=True)
             return
 
         # Use db_update_reminder_datetime to update the reminder in the database
@@ -1584,38 +2451,36 @@ class ReminderDateView(ui.View):
             await interaction.response.send_message("Failed to schedule reminder. Please try again.", ephemeral=True)
             return
 
-        # Fetch the updated reminder data to pass to schedule_reminder
-        reminders_data = await db_get_reminders(str(interaction.guild_id))
-        reminder = next((r for r in reminders_data if r["reminder_id"] == self.reminder_id), None)
-
-        if reminder:
-            schedule_reminder(str(interaction.guild_id), self.reminder_id, reminder)
-        else:
-            await interaction.response.send_message("Reminder not found after update, scheduling failed.", ephemeral=True)
-            return
+        reminder = {
+            "reminder_id": self.reminder_id,
+            "title": self.title,
+            "datetime": dt.isoformat(),
+            "datetime_obj": dt,
+            "channel_id": interaction.channel_id,
+        }
+        schedule_reminder(str(interaction.guild_id), self.reminder_id, reminder)
 
         await interaction.response.edit_message(
-            content=f"Reminder '**{self.title}**' scheduled for **{dt.strftime('%Y-%m-%d %I:%M %p')}**",
+            content=REMINDER_SCHEDULED_TEMPLATE.format(title=self.title, when=dt.strftime('%Y-%m-%d %I:%M %p')),
             view=None
         )
 
 
 class ReminderSelectView(ui.View):
-    def __init__(self, reminders_list: list[tuple[str, dict]], action: str):
+    @staticmethod
+    def build_option(rid: str, data: dict) -> SelectOption:
+        label = f"{data['title']}"
+        dt = data.get('datetime_obj')
+        if dt:
+            label += f" - {dt.strftime('%Y-%m-%d %I:%M %p')}"
+        return SelectOption(label=label[:100], value=rid)
+
+    def __init__(self, reminders_list: Iterable[tuple[str, dict]], action: str, guild_id: str = None, rows_version: int = -1):
         super().__init__(timeout=180.0)
-        self.reminders_list = reminders_list
+        self._by_id = dict(reminders_list)
         self.action = action
 
-        options = []
-        for rid, data in reminders_list:
-            label = f"{data['title']}"
-            if 'datetime' in data and data['datetime']:
-                try:
-                    dt = datetime.fromisoformat(data['datetime'])
-                    label += f" - {dt.strftime('%Y-%m-%d %I:%M %p')}"
-                except:
-                    pass
-            options.append(SelectOption(label=label[:100], value=rid))
+        options = cached_select_options(guild_id, "reminders", "select", self._by_id.items(), self.build_option, rows_version)
 
         if not options:
             self.clear_items()
@@ -1632,14 +2497,13 @@ class ReminderSelectView(ui.View):
 
     async def callback(self, interaction: discord.Interaction):
         selected_id = self.select.values[0]
-        reminders = await load_json(REMINDERS_FILE)
         guild_id = str(interaction.guild_id)
 
-        if guild_id not in reminders or selected_id not in reminders[guild_id]:
+        reminder = self._by_id.get(selected_id)
+        if not reminder:
             await interaction.response.send_message("Reminder not found.", ephemeral=True)
             return
 
-        reminder = reminders[guild_id][selected_id]
         title = reminder['title']
 
         if self.action == "delete":
@@ -1648,9 +2512,9 @@ class ReminderSelectView(ui.View):
                 await interaction.response.send_message("Failed to delete reminder. Please try again.", ephemeral=True)
                 return
 
-            if guild_id in scheduled_reminder_tasks and selected_id in scheduled_reminder_tasks[guild_id]:
-                scheduled_reminder_tasks[guild_id][selected_id].cancel()
-                del scheduled_reminder_tasks[guild_id][selected_id]
+            task = scheduled_reminder_tasks.pop((guild_id, selected_id), None)
+            if task:
+                task.cancel()
 
             await interaction.response.edit_message(
                 content=f"Deleted reminder: **{title}**",
@@ -1658,17 +2522,12 @@ class ReminderSelectView(ui.View):
             )
 
         elif self.action == "edit":
-            reminders = await db_get_reminders(guild_id)
-            reminder = next((r for r in reminders if r["reminder_id"] == selected_id), None)
-            if reminder:
-                await interaction.response.send_message(
-                    f"Selected for edit: **{reminder['title']}**\n"
-                    f"Current time: {reminder['datetime'] or 'Not scheduled'}\n"
-                    "(Full edit coming soon – currently only view supported)",
-                    ephemeral=True
-                )
-            else:
-                await interaction.response.send_message("Reminder not found.", ephemeral=True)
+            await interaction.response.send_message(
+                f"Selected for edit: **{title}**\n"
+                f"Current time: {reminder['datetime'] or 'Not scheduled'}\n"
+                "(Full edit coming soon – currently only view supported)",
+                ephemeral=True
+            )
 
 
 # ────────────────────────────────────────────────
@@ -1676,14 +2535,16 @@ class ReminderSelectView(ui.View):
 # ────────────────────────────────────────────────
 
 class AssignmentSelectView(ui.View):
-    def __init__(self, assignments_list: list[tuple[str, dict]]):
+    @staticmethod
+    def build_option(aid: str, data: dict) -> SelectOption:
+        label = f"{data['subject']} - {data['title']} - {data['deadline']}"
+        return SelectOption(label=label[:100], value=aid)
+
+    def __init__(self, assignments_list: Iterable[tuple[str, dict]], guild_id: str = None, rows_version: int = -1):
         super().__init__(timeout=180.0)
-        self.assignments_list = assignments_list
+        self._by_id = dict(assignments_list)
 
-        options = []
-        for aid, data in assignments_list:
-            label = f"{data['subject']} - {data['title']} - {data['deadline']}"
-            options.append(SelectOption(label=label[:100], value=aid))
+        options = cached_select_options(guild_id, "assignments", "select", self._by_id.items(), self.build_option, rows_version)
 
         self.select = ui.Select(
             placeholder="Select assignment...",
@@ -1696,10 +2557,8 @@ class AssignmentSelectView(ui.View):
 
     async def callback(self, interaction: discord.Interaction):
         selected_id = self.select.values[0]
-        guild_id = str(interaction.guild_id)
 
-        assignments_data = await db_get_assignments(guild_id)
-        assign = next((a for a in assignments_data if a["assignment_id"] == selected_id), None)
+        assign = self._by_id.get(selected_id)
 
         if not assign:
             await interaction.response.send_message("Assignment not found.", ephemeral=True)
@@ -1707,10 +2566,7 @@ class AssignmentSelectView(ui.View):
 
         file_paths = assign.get('file_paths', [])
 
-        files = []
-        for path in file_paths:
-            if Path(path).exists():
-                files.append(discord.File(path, filename=Path(path).name))
+        files = await asyncio.to_thread(open_existing_files, file_paths)
 
         embed = discord.Embed(
             title=assign['title'],
@@ -1730,12 +2586,11 @@ class AssignmentSelectView(ui.View):
 # ────────────────────────────────────────────────
 
 class SubjectSelectView(ui.View):
-    def __init__(self, subjects: list[str]):
+    def __init__(self, options: tuple[SelectOption, ...]):
         super().__init__(timeout=180.0)
-        options = [SelectOption(label=s, value=s) for s in subjects]
         self.select = ui.Select(
             placeholder="Select subject...",
-            options=options,
+            options=list(options),
             min_values=1,
             max_values=1
         )
@@ -1745,7 +2600,7 @@ class SubjectSelectView(ui.View):
     async def callback(self, interaction: discord.Interaction):
         subject = self.select.values[0]
         guild_id = str(interaction.guild_id)
-        notes_data = await db_get_notes(guild_id)
+        notes_data = await cached_rows(guild_id, "notes", db_get_notes)
 
         subject_notes = [
             (n["note_id"], n) for n in notes_data
@@ -1758,7 +2613,8 @@ class SubjectSelectView(ui.View):
             )
             return
 
-        view = NoteSelectView(subject_notes)
+        view = NoteSelectView(subject_notes, guild_id, subject,
+                              rows_version=rows_version(guild_id, "notes", notes_data))
 
         await interaction.response.edit_message(
             content=f"Select note from **{subject}**:",
@@ -1767,11 +2623,13 @@ class SubjectSelectView(ui.View):
 
 
 class NoteSelectView(ui.View):
-    def __init__(self, notes_list: list[tuple[str, dict]]):
+    def __init__(self, notes_list: Iterable[tuple[str, dict]], guild_id: str = None, subject: str = None,
+                 rows_version: int = -1):
         super().__init__(timeout=180.0)
-        self.notes_list = notes_list
-        options = [SelectOption(label=data['title'], value=nid)
-                   for nid, data in notes_list]
+        self._by_id = dict(notes_list)
+        options = cached_select_options(
+            guild_id, "notes", f"subject:{subject}", self._by_id.items(),
+            lambda nid, data: SelectOption(label=data['title'], value=nid), rows_version)
         self.select = ui.Select(
             placeholder="Select note...",
             options=options,
@@ -1785,7 +2643,7 @@ class NoteSelectView(ui.View):
         selected_id = self.select.values[0]
         guild_id = str(interaction.guild_id)
 
-        note = next((n for nid, n in self.notes_list if nid == selected_id), None)
+        note = self._by_id.get(selected_id)
 
         if not note:
             await interaction.response.send_message("Note not found.", ephemeral=True)
@@ -1793,8 +2651,7 @@ class NoteSelectView(ui.View):
 
         file_paths = note.get('file_paths', [])
 
-        files = [discord.File(path, filename=Path(path).name)
-                 for path in file_paths if Path(path).exists()]
+        files = await asyncio.to_thread(open_existing_files, file_paths)
 
         embed = discord.Embed(
             title=note['title'],
@@ -1823,7 +2680,7 @@ class NoteCreateModal(ui.Modal, title="Create New Note"):
         subject = self.note_subject.value.strip()
 
         guild_id = str(interaction.guild_id)
-        note_id = str(uuid.uuid4())
+        note_id = secrets.token_hex(16)
         creator_id = str(interaction.user.id)
 
         success = await db_add_note(guild_id, note_id, title, subject, [], creator_id)
@@ -1836,14 +2693,17 @@ class NoteCreateModal(ui.Modal, title="Create New Note"):
 
 
 class NoteAssignView(ui.View):
-    def __init__(self, notes_list: list[tuple[str, dict]], temp_paths: list[str]):
+    @staticmethod
+    def build_option(nid: str, data: dict) -> SelectOption:
+        label = f"{data['subject']} - {data['title']} ({nid[:8]})"
+        return SelectOption(label=label[:100], value=nid)
+
+    def __init__(self, notes_list: Iterable[tuple[str, dict]], temp_paths: list[str], guild_id: str = None,
+                 rows_version: int = -1):
         super().__init__(timeout=180.0)
         self.temp_paths = temp_paths
 
-        options = []
-        for nid, data in notes_list:
-            label = f"{data['subject']} - {data['title']} ({nid[:8]})"
-            options.append(SelectOption(label=label[:100], value=nid))
+        options = cached_select_options(guild_id, "notes", "assign", notes_list, self.build_option, rows_version)
 
         self.select = ui.Select(
             placeholder="Select note to assign files...",
@@ -1858,8 +2718,8 @@ class NoteAssignView(ui.View):
         selected_id = self.select.values[0]
         guild_id = str(interaction.guild_id)
 
-        notes_data = await db_get_notes(guild_id)
-        note = next((n for n in notes_data if n["note_id"] == selected_id), None)
+        # Single fresh row: file_paths is merged below and must not be stale
+        note = await db_get_note(guild_id, selected_id)
 
         if not note:
             await interaction.response.send_message("Note not found.", ephemeral=True)
@@ -1867,15 +2727,7 @@ class NoteAssignView(ui.View):
 
         subject = note['subject']
         assets_dir = Path("assets/notes") / subject.replace(" ", "_")
-        assets_dir.mkdir(parents=True, exist_ok=True)
-        new_paths = []
-
-        for temp_path_str in self.temp_paths:
-            temp_path = Path(temp_path_str)
-            if temp_path.exists():
-                new_path = assets_dir / temp_path.name
-                temp_path.rename(new_path)
-                new_paths.append(str(new_path))
+        new_paths = await move_temps(self.temp_paths, assets_dir)
 
         updated_file_paths = note['file_paths'] + new_paths
         success = await db_update_note_files(guild_id, selected_id, updated_file_paths)
@@ -1916,7 +2768,7 @@ class AssignmentCreateModal(ui.Modal, title="Create New Assignment"):
             return
 
         guild_id = str(interaction.guild_id)
-        assignment_id = str(uuid.uuid4())
+        assignment_id = secrets.token_hex(16)
         creator_id = str(interaction.user.id)
 
         success = await db_add_assignment(guild_id, assignment_id, title, description, dt, subject, [], creator_id)
@@ -1931,15 +2783,24 @@ class AssignmentCreateModal(ui.Modal, title="Create New Assignment"):
         )
 
 
+ASSIGN_OPTION_LABEL = "{subject} - {title} ({short_id}) - Due {deadline}"
+
+
 class AssignmentAssignView(ui.View):
-    def __init__(self, assignments_list: list[tuple[str, dict]], temp_paths: list[str]):
+    @staticmethod
+    def build_option(aid: str, data: dict) -> SelectOption:
+        # Title capped up front so the deadline survives the 100-char limit
+        label = ASSIGN_OPTION_LABEL.format(
+            subject=data['subject'], title=data['title'][:40],
+            short_id=aid[:8], deadline=data['deadline'])
+        return SelectOption(label=label[:100], value=aid)
+
+    def __init__(self, assignments_list: Iterable[tuple[str, dict]], temp_paths: list[str], guild_id: str = None,
+                 rows_version: int = -1):
         super().__init__(timeout=180.0)
         self.temp_paths = temp_paths
 
-        options = []
-        for aid, data in assignments_list:
-            label = f"{data['subject']} - {data['title']} ({aid[:8]}) - Due {data['deadline']}"
-            options.append(SelectOption(label=label[:100], value=aid))
+        options = cached_select_options(guild_id, "assignments", "assign", assignments_list, self.build_option, rows_version)
 
         self.select = ui.Select(
             placeholder="Select assignment to assign files...",
@@ -1954,8 +2815,8 @@ class AssignmentAssignView(ui.View):
         selected_id = self.select.values[0]
         guild_id = str(interaction.guild_id)
 
-        assignments_data = await db_get_assignments(guild_id)
-        assign = next((a for a in assignments_data if a["assignment_id"] == selected_id), None)
+        # Single fresh row: file_paths is merged below and must not be stale
+        assign = await db_get_assignment(guild_id, selected_id)
 
         if not assign:
             await interaction.response.send_message("Assignment not found.", ephemeral=True)
@@ -1963,15 +2824,7 @@ class AssignmentAssignView(ui.View):
 
         subject = assign['subject']
         assets_dir = Path("assets/assignments") / subject.replace(" ", "_")
-        assets_dir.mkdir(parents=True, exist_ok=True)
-        new_paths = []
-
-        for temp_path_str in self.temp_paths:
-            temp_path = Path(temp_path_str)
-            if temp_path.exists():
-                new_path = assets_dir / temp_path.name
-                temp_path.rename(new_path)
-                new_paths.append(str(new_path))
+        new_paths = await move_temps(self.temp_paths, assets_dir)
 
         updated_file_paths = assign['file_paths'] + new_paths
         success = await db_update_assignment_files(guild_id, selected_id, updated_file_paths)
@@ -1990,52 +2843,60 @@ class AssignmentAssignView(ui.View):
 # HELP COMMAND (updated to include new reminder commands)
 # ────────────────────────────────────────────────
 
-@tree.command(name="help", description="Show all available commands and their usage")
-async def cmd_help(interaction: discord.Interaction):
+HELP_COMMANDS = (
+    ("**/help**", "Shows this help message"),
+    ("**/todo**", "Add a new task to the guild todo list"),
+    ("**/todo-list**", "View and manage (complete/remove) guild todo tasks"),
+    ("**/set-reminder**", "Create a group reminder that pings @everyone"),
+    ("**/delete-reminder**", "Delete an existing group reminder"),
+    ("**/edit-reminder**", "Edit an existing group reminder (basic)"),
+    ("**/create-notes**", "Create a new note entry"),
+    ("**/load-notes**", "Upload files → assign them to an existing note"),
+    ("**/fetch-notes**", "Browse and download study notes by subject"),
+    ("**/create-assignment**", "Create a new assignment entry"),
+    ("**/load-assignment**", "Upload files → assign to an existing assignment"),
+    ("**/fetch-assignments**", "View and download assignments with files"),
+    ("**/talk**", "Talk to JOI (Gemini AI)"),
+    ("**/play**", "Plays audio from a YouTube URL in your voice channel"),
+    ("**/stop**", "Stops the current audio playback and disconnects the bot"),
+    ("**/set-event**", "Create a new event with mentioned members"),
+    ("**/delete-event**", "Delete an existing event"),
+    ("**/edit-event**", "Select an event to edit (placeholder)"),
+    ("**/stop-reminder**", "Remove yourself from active event reminders"),
+    ("**/call**", "Schedule mass pings (call spam) after delay"),
+    ("**/stop-calling**", "Remove yourself from active call spam"),
+    ("**/check-attendance**", "Show your attendance stats from Firebase"),
+    ("**/timetable**", "Display your timetable image"),
+    ("**/reload-timetable**", "Re-read the timetable image after it changes (admin)"),
+    ("**/soonambedu**", "Get a random image from the Soonambedu collection"),
+    ("**/diddyfrancis**", "Get a random Shyam Francis related image"),
+    ("**/add-lab-manual**", "Create a new lab manual subject folder"),
+    ("**/fetch-lab-manual-programs**",
+     "Browse and read lab experiment code files"),
+)
+
+
+def build_help_embed() -> discord.Embed:
     embed = discord.Embed(
         title="JOI Bot Commands Help",
         description="Here are all the commands you can use:",
         color=0x5865F2
     )
-
-    commands_list = [
-        ("**/help**", "Shows this help message"),
-        ("**/todo**", "Add a new task to the guild todo list"),
-        ("**/todo-list**", "View and manage (complete/remove) guild todo tasks"),
-        ("**/set-reminder**", "Create a group reminder that pings @everyone"),
-        ("**/delete-reminder**", "Delete an existing group reminder"),
-        ("**/edit-reminder**", "Edit an existing group reminder (basic)"),
-        ("**/create-notes**", "Create a new note entry"),
-        ("**/load-notes**", "Upload files → assign them to an existing note"),
-        ("**/fetch-notes**", "Browse and download study notes by subject"),
-        ("**/create-assignment**", "Create a new assignment entry"),
-        ("**/load-assignment**", "Upload files → assign to an existing assignment"),
-        ("**/fetch-assignments**", "View and download assignments with files"),
-        ("**/talk**", "Talk to JOI (Gemini AI)"),
-        ("**/play**", "Plays audio from a YouTube URL in your voice channel"),
-        ("**/stop**", "Stops the current audio playback and disconnects the bot"),
-        ("**/set-event**", "Create a new event with mentioned members"),
-        ("**/delete-event**", "Delete an existing event"),
-        ("**/edit-event**", "Select an event to edit (placeholder)"),
-        ("**/stop-reminder**", "Remove yourself from active event reminders"),
-        ("**/call**", "Schedule mass pings (call spam) after delay"),
-        ("**/stop-calling**", "Remove yourself from active call spam"),
-        ("**/check-attendance**", "Show your attendance stats from Firebase"),
-        ("**/timetable**", "Display your timetable image"),
-        ("**/soonambedu**", "Get a random image from the Soonambedu collection"),
-        ("**/diddyfrancis**", "Get a random Shyam Francis related image"),
-        ("**/add-lab-manual**", "Create a new lab manual subject folder"),
-        ("**/fetch-lab-manual-programs**",
-         "Browse and read lab experiment code files"),
-    ]
-
-    for name, desc in commands_list:
+    for name, desc in HELP_COMMANDS:
         embed.add_field(name=name, value=desc, inline=False)
-
     embed.set_footer(
         text="JOI - EVERYTHING YOU WANT TO SEE, EVERYTHING YOU WANT TO HEAR")
+    return embed
+
+
+# Static content: built once, serialized on each send
+_HELP_EMBED = build_help_embed()
+
+
+@tree.command(name="help", description="Show all available commands and their usage")
+async def cmd_help(interaction: discord.Interaction):
+    await interaction.response.send_message(embed=_HELP_EMBED, ephemeral=False)
 
-    await interaction.response.send_message(embed=embed, ephemeral=False)
 
 # ────────────────────────────────────────────────
 # UPTIME CLI (shows real server uptime)
@@ -2049,85 +2910,38 @@ async def cmd_uptime_cli(interaction: discord.Interaction):
     #     await interaction.response.send_message("This command is restricted.", ephemeral=True)
     #     return
 
-    # Give us time to run system command
-    await interaction.response.defer(ephemeral=False)
-
+    # Straight from /proc (Linux): no fork/exec of `uptime` per call
     try:
-        # Run the actual uptime command
-        import subprocess
-        result = subprocess.run(
-            ["uptime"],
-            capture_output=True,
-            text=True,
-            timeout=8
-        )
-
-        if result.returncode != 0:
-            await interaction.followup.send(
-                "Failed to read server uptime.\n"
-                f"Error: {result.stderr.strip() or 'command failed'}",
-                ephemeral=True
-            )
-            return
-
-        raw_output = result.stdout.strip()
-
-        # ────────────────────────────────────────────────
-        # Parse typical uptime output (Linux)
-        # Examples:
-        #  15:42:19 up  5 days,  3:17,  1 user,  load average: 0.12, 0.15, 0.18
-        #  10:05:22 up 12 min,  3 users,  load average: 1.45, 0.92, 0.68
-        # ────────────────────────────────────────────────
-
-        # Basic clean version
-        embed = discord.Embed(
-            title="🖥️ Server Uptime",
-            color=0x00c4b4,
-            timestamp=datetime.utcnow()
-        )
-
-        embed.add_field(
-            name="Uptime Output",
-            value=f"```\n{raw_output}\n```",
-            inline=False
+        with open('/proc/uptime') as f:
+            uptime_secs = int(float(f.read().split()[0]))
+        with open('/proc/loadavg') as f:
+            load = ", ".join(f.read().split()[:3])
+    except (OSError, ValueError, IndexError):
+        await interaction.response.send_message(
+            "Server uptime is unavailable: /proc not available on this host.",
+            ephemeral=True
         )
+        return
 
-        # Try to extract nicer fields (optional parsing)
-        try:
-            parts = raw_output.split("up", 1)
-            if len(parts) == 2:
-                time_part = parts[1].strip().split(",", 2)
-                uptime_str = time_part[0].strip()
-                users_load = ", ".join(time_part[1:]).strip() if len(
-                    time_part) > 1 else ""
+    uptime_str = str(timedelta(seconds=uptime_secs))
 
-                embed.add_field(name="Running for",
-                                value=uptime_str, inline=True)
-                if users_load:
-                    embed.add_field(name="Users / Load",
-                                    value=users_load, inline=True)
-        except:
-            pass  # fallback to raw if parsing fails
+    embed = discord.Embed(
+        title="🖥️ Server Uptime",
+        color=0x00c4b4,
+        timestamp=datetime.utcnow()
+    )
 
-        embed.set_footer(text="Host machine uptime • JOI Bot")
+    embed.add_field(
+        name="Uptime Output",
+        value=f"```\nup {uptime_str},  load average: {load}\n```",
+        inline=False
+    )
+    embed.add_field(name="Running for", value=uptime_str, inline=True)
+    embed.add_field(name="Load (1/5/15 min)", value=load, inline=True)
 
-        await interaction.followup.send(embed=embed)
+    embed.set_footer(text="Host machine uptime • JOI Bot")
 
-    except FileNotFoundError:
-        await interaction.followup.send(
-            "The `uptime` command is not available on this server.",
-            ephemeral=True
-        )
-    except subprocess.TimeoutExpired:
-        await interaction.followup.send(
-            "Reading uptime timed out.",
-            ephemeral=True
-        )
-    except Exception as e:
-        await interaction.followup.send(
-            f"Error while checking uptime:\n```py\n{type(e).__name__}: {str(e)}\n```",
-            ephemeral=True
-        )
+    await interaction.response.send_message(embed=embed)
 
 # ────────────────────────────────────────────────
 # ADMIN ONLY COMMANDS
@@ -2154,7 +2968,8 @@ async def admin_announce(interaction: discord.Interaction, message: str):
     await interaction.response.defer(ephemeral=True)
 
     try:
-        await interaction.channel.send(
+        await paced_send(
+            interaction.channel,
             f"📢 **OFFICIAL ANNOUNCEMENT** 📢\n\n{announcement}\n\n||@everyone||"
         )
         await interaction.followup.send(
@@ -2168,11 +2983,49 @@ async def admin_announce(interaction: discord.Interaction, message: str):
 # LAB MANUAL COMMANDS
 # ────────────────────────────────────────────────
 
+class PagedSelectView(ui.View):
+    # One select over pre-sliced option pages, with prev/next buttons once
+    # there are more than 25 options
+
+    def __init__(self, pages: list[list[SelectOption]], placeholder: str, on_select):
+        super().__init__(timeout=180)
+        self.pages = pages
+        self.page = 0
+        self.placeholder = placeholder
+
+        self.select = ui.Select(placeholder=placeholder, options=list(pages[0]))
+        self.select.callback = on_select
+        self.add_item(self.select)
+
+        if len(pages) > 1:
+            self.select.placeholder = self.page_placeholder()
+            self.prev_button = ui.Button(label="◀ Prev", style=discord.ButtonStyle.secondary)
+            self.prev_button.callback = self.prev_page
+            self.add_item(self.prev_button)
+            self.next_button = ui.Button(label="Next ▶", style=discord.ButtonStyle.secondary)
+            self.next_button.callback = self.next_page
+            self.add_item(self.next_button)
+
+    def page_placeholder(self) -> str:
+        return f"{self.placeholder} (page {self.page + 1}/{len(self.pages)})"
+
+    async def turn(self, interaction: discord.Interaction, step: int):
+        self.page = (self.page + step) % len(self.pages)
+        self.select.options = list(self.pages[self.page])
+        self.select.placeholder = self.page_placeholder()
+        await interaction.response.edit_message(view=self)
+
+    async def prev_page(self, interaction: discord.Interaction):
+        await self.turn(interaction, -1)
+
+    async def next_page(self, interaction: discord.Interaction):
+        await self.turn(interaction, 1)
+
 
 @tree.command(name="add-lab-manual", description="Create a new lab manual subject folder")
 @app_commands.describe(subject="Name of the lab/subject (e.g. Data Structures Lab)")
 async def cmd_add_lab_manual(interaction: discord.Interaction, subject: str):
-    folder_name = re.sub(r'[^a-zA-Z0-9_-]', '_', subject.strip())
+    folder_name = _SAFE_NAME_RE.sub('_', subject.strip())
     folder_path = LAB_MANUALS_DIR / folder_name
 
     if folder_path.exists():
@@ -2182,7 +3035,7 @@ async def cmd_add_lab_manual(interaction: discord.Interaction, subject: str):
         return
 
     try:
-        folder_path.mkdir(parents=True, exist_ok=True)
+        await ensure_dir(folder_path)
         await interaction.response.send_message(
             f"Lab manual subject **{subject}** created.\n"
             f"Folder: `lab-manuals/{folder_name}/`\n"
@@ -2195,91 +3048,57 @@ async def cmd_add_lab_manual(interaction: discord.Interaction, subject: str):
 
 @tree.command(name="fetch-lab-manual-programs", description="Browse and get lab manual experiment code")
 async def cmd_fetch_lab_manual(interaction: discord.Interaction):
-    if not LAB_MANUALS_DIR.exists() or not any(LAB_MANUALS_DIR.iterdir()):
+    subject_pages = lab_subject_pages()
+
+    if not subject_pages:
         await interaction.response.send_message(
             "No lab manuals found. Create one with `/add-lab-manual`.",
             ephemeral=True
         )
         return
 
-    subjects = [d.name.replace('_', ' ')
-                for d in LAB_MANUALS_DIR.iterdir() if d.is_dir()]
-    subjects.sort()
+    async def on_subject_select(inter: discord.Interaction):
+        folder_name = inter.data["values"][0]
+        subject_path = LAB_MANUALS_DIR / folder_name
 
-    if not subjects:
-        await interaction.response.send_message("No lab manual subjects found.", ephemeral=True)
-        return
+        experiment_pages = lab_experiment_pages(subject_path)
 
-    class SubjectDropdown(ui.View):
-        def __init__(self):
-            super().__init__(timeout=180)
-            subject_select = ui.Select(
-                placeholder="Select Lab Manual Subject...",
-                options=[SelectOption(label=s, value=s.replace(' ', '_'))
-                         for s in subjects]
+        if not experiment_pages:
+            await inter.response.send_message(
+                f"No experiment files (`exp*.txt`) found in **{folder_name.replace('_', ' ')}**.",
+                ephemeral=True
             )
-            subject_select.callback = self.on_subject_select
-            self.add_item(subject_select)
+            return
 
-        async def on_subject_select(self, inter: discord.Interaction):
-            folder_name = inter.data["values"][0]
-            subject_path = LAB_MANUALS_DIR / folder_name
+        async def on_exp_select(inter2: discord.Interaction):
+            file_path = Path(inter2.data["values"][0])
 
-            experiments = []
-            for file in subject_path.glob("exp*.txt"):
-                try:
-                    num = int(file.stem.replace("exp", ""))
-                    experiments.append((num, file.name, str(file)))
-                except ValueError:
-                    continue
-
-            if not experiments:
-                await inter.response.send_message(
-                    f"No experiment files (`exp*.txt`) found in **{folder_name.replace('_', ' ')}**.",
-                    ephemeral=True
-                )
+            try:
+                content, truncated = await asyncio.to_thread(read_head, file_path, 1900)
+            except FileNotFoundError:
+                await inter2.response.send_message("File disappeared.", ephemeral=True)
+                return
+            except OSError as e:
+                await inter2.response.send_message(f"Error reading file: {str(e)}", ephemeral=True)
                 return
 
-            experiments.sort(key=lambda x: x[0])
-
-            class ExperimentDropdown(ui.View):
-                def __init__(self):
-                    super().__init__(timeout=180)
-                    exp_select = ui.Select(
-                        placeholder="Select Experiment...",
-                        options=[SelectOption(
-                            label=f"Experiment {num} - {fname}",
-                            value=file_path
-                        ) for num, fname, file_path in experiments]
-                    )
-                    exp_select.callback = self.on_exp_select
-                    self.add_item(exp_select)
-
-                async def on_exp_select(self, inter2: discord.Interaction):
-                    file_path = Path(inter2.data["values"][0])
-                    if not file_path.exists():
-                        await inter2.response.send_message("File disappeared.", ephemeral=True)
-                        return
-
-                    try:
-                        content = file_path.read_text(encoding="utf-8")
-                        if len(content) > 1900:
-                            content = content[:1900] + \
-                                "\n\n... (truncated - full file on server)"
-                        await inter2.response.send_message(
-                            f"**Experiment from {folder_name.replace('_', ' ')}**\n"
-                            f"```{file_path.name}```\n```txt\n{content}\n```",
-                            ephemeral=False
-                        )
-                    except Exception as e:
-                        await inter2.response.send_message(f"Error reading file: {str(e)}", ephemeral=True)
-
-            await inter.response.edit_message(
-                content=f"Select experiment from **{folder_name.replace('_', ' ')}**:",
-                view=ExperimentDropdown()
-            )
+            try:
+                if truncated:
+                    content += "\n\n... (truncated - full file on server)"
+                await inter2.response.send_message(
+                    f"**Experiment from {folder_name.replace('_', ' ')}**\n"
+                    f"```{file_path.name}```\n```txt\n{content}\n```",
+                    ephemeral=False
+                )
+            except Exception as e:
+                await inter2.response.send_message(f"Error reading file: {str(e)}", ephemeral=True)
+
+        await inter.response.edit_message(
+            content=f"Select experiment from **{folder_name.replace('_', ' ')}**:",
+            view=PagedSelectView(experiment_pages, "Select Experiment...", on_exp_select)
+        )
 
-    view = SubjectDropdown()
+    view = PagedSelectView(subject_pages, "Select Lab Manual Subject...", on_subject_select)
     await interaction.response.send_message("Select lab manual subject:", view=view, ephemeral=False)
 
 
@@ -2291,17 +3110,15 @@ async def cmd_fetch_lab_manual(interaction: discord.Interaction):
 @app_commands.describe(title="Reminder title / message")
 async def cmd_set_reminder(interaction: discord.Interaction, title: str):
     guild_id = str(interaction.guild_id)
-    reminder_id = str(uuid.uuid4())
+    reminder_id = secrets.token_hex(16)
     creator_id = str(interaction.user.id)
 
-    # Initially create the reminder with datetime and channel_id as None, they will be updated by ReminderDateView
-    success = await db_add_reminder(guild_id, reminder_id, title.strip(), creator_id, None, None)
-
-    if not success:
-        await interaction.response.send_message("Failed to create reminder. Please try again.", ephemeral=True)
-        return
+    # Initially create the reminder with datetime and channel_id as None, they will be updated by ReminderDateView.
+    # The insert runs while the date picker is sent instead of before it.
+    insert_task = asyncio.create_task(
+        db_add_reminder(guild_id, reminder_id, title.strip(), creator_id, None, None))
 
-    view = ReminderDateView(reminder_id, title)
+    view = ReminderDateView(reminder_id, title, insert_task)
 
     await interaction.response.send_message(
         f"Reminder **{title}** created.\n"
@@ -2310,25 +3127,30 @@ async def cmd_set_reminder(interaction: discord.Interaction, title: str):
         ephemeral=False
     )
 
+    if not await insert_task:
+        view.stop()
+        await interaction.edit_original_response(
+            content="Failed to create reminder. Please try again.", view=None)
+
 
 @tree.command(name="delete-reminder", description="Delete an existing group reminder")
+@defer_first(ephemeral=True)
 async def cmd_delete_reminder(interaction: discord.Interaction):
     guild_id = str(interaction.guild_id)
-    reminders = await db_get_reminders(guild_id)
+    reminders = await cached_rows(guild_id, "reminders", db_get_reminders)
 
     if not reminders:
-        await interaction.response.send_message("No reminders found in this server.", ephemeral=True)
+        await interaction.followup.send("No reminders found in this server.", ephemeral=True)
         return
 
-    # Convert the list of dictionaries to a list of tuples (reminder_id, data)
-    reminder_list = [(r["reminder_id"], r) for r in reminders]
-    view = ReminderSelectView(reminder_list, action="delete")
+    view = ReminderSelectView(((r["reminder_id"], r) for r in reminders), action="delete", guild_id=guild_id,
+                              rows_version=rows_version(guild_id, "reminders", reminders))
 
     if not view.children:
-        await interaction.response.send_message("No reminders available to delete.", ephemeral=True)
+        await interaction.followup.send("No reminders available to delete.", ephemeral=True)
         return
 
-    await interaction.response.send_message(
+    await interaction.followup.send(
         "Select the reminder you want to **delete**:",
         view=view,
         ephemeral=True
@@ -2336,22 +3158,23 @@ async def cmd_delete_reminder(interaction: discord.Interaction):
 
 
 @tree.command(name="edit-reminder", description="Edit an existing group reminder (title/date)")
+@defer_first(ephemeral=True)
 async def cmd_edit_reminder(interaction: discord.Interaction):
     guild_id = str(interaction.guild_id)
-    reminders = await db_get_reminders(guild_id)
+    reminders = await cached_rows(guild_id, "reminders", db_get_reminders)
 
     if not reminders:
-        await interaction.response.send_message("No reminders found in this server.", ephemeral=True)
+        await interaction.followup.send("No reminders found in this server.", ephemeral=True)
         return
 
-    reminder_list = [(r["reminder_id"], r) for r in reminders]
-    view = ReminderSelectView(reminder_list, action="edit")
+    view = ReminderSelectView(((r["reminder_id"], r) for r in reminders), action="edit", guild_id=guild_id,
+                              rows_version=rows_version(guild_id, "reminders", reminders))
 
     if not view.children:
-        await interaction.response.send_message("No reminders available to edit.", ephemeral=True)
+        await interaction.followup.send("No reminders available to edit.", ephemeral=True)
         return
 
-    await interaction.response.send_message(
+    await interaction.followup.send(
         "Select the reminder you want to **edit**:",
         view=view,
         ephemeral=True
@@ -2368,12 +3191,13 @@ async def cmd_todo(interaction: discord.Interaction):
 
 
 @tree.command(name="todo-list", description="Show and manage the guild's todo list")
+@defer_first()
 async def cmd_todo_list(interaction: discord.Interaction):
     guild_id = str(interaction.guild_id)
-    todos = await db_get_todos(guild_id)
+    todos = await cached_rows(guild_id, "todos", db_get_todos)
 
     if not todos:
-        await interaction.response.send_message(
+        await interaction.followup.send(
             "🎉 The guild to-do list is currently empty!\nAdd something with `/todo`",
             ephemeral=False
         )
@@ -2389,10 +3213,7 @@ async def cmd_todo_list(interaction: discord.Interaction):
     )
 
     for i, (task_id, data) in enumerate(todo_items, 1):
-        created_by = f"<@{data['created_by']}>"
-        created_at = datetime.fromisoformat(
-            data['created_at']).strftime("%b %d, %Y %H:%M")
-        value = f"Added by {created_by} • {created_at}"
+        value = f"Added by <@{data['created_by']}> • {data['created_at_display']}"
         embed.add_field(
             name=f"{i}. {data['text']}",
             value=value,
@@ -2402,13 +3223,13 @@ async def cmd_todo_list(interaction: discord.Interaction):
     embed.set_footer(
         text=f"{len(todo_items)} task{'s' if len(todo_items) != 1 else ''} • Use the menu below to complete tasks")
 
-    view = TodoSelectView(todo_items)
+    view = TodoSelectView(todo_items, guild_id, rows_version(guild_id, "todos", todos))
 
     if not view.children:
         embed.description = "No tasks available to manage right now."
         view = None
 
-    await interaction.response.send_message(
+    await interaction.followup.send(
         embed=embed,
         view=view,
         ephemeral=False
@@ -2417,69 +3238,108 @@ async def cmd_todo_list(interaction: discord.Interaction):
 # ────────────────────────────────────────────────
 # WEB SERVER
 # ────────────────────────────────────────────────
+UPLOAD_CHUNK_SIZE = 262144  # aiohttp's default is 8 KiB
 
 
-async def handle_assignment_upload(request):
-    if not DEFAULT_GUILD_ID:
-        return web.json_response({'status': 'error', 'message': 'Server not configured'}, status=500)
+class UploadTooLarge(Exception):
+    pass
 
-    guild_id = DEFAULT_GUILD_ID
 
-    temp_dir = Path("assets/assignments/temp")
-    temp_dir.mkdir(parents=True, exist_ok=True)
+async def read_part(part, limit: int) -> bytearray:
+    # Text fields only; file bodies go through spool_part
+    buf = bytearray()
+    while chunk := await part.read_chunk(UPLOAD_CHUNK_SIZE):
+        buf += chunk
+        if len(buf) > limit:
+            raise UploadTooLarge()
+    return buf
+
+
+async def spool_part(part, path: Path, limit: int) -> int:
+    # Each chunk is written out as it arrives (in a worker thread), so only
+    # one chunk per upload is ever held in memory
+    f = await asyncio.to_thread(open, path, 'wb')
+    size = 0
+    try:
+        while chunk := await part.read_chunk(UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > limit:
+                raise UploadTooLarge()
+            await asyncio.to_thread(f.write, chunk)
+    finally:
+        await asyncio.to_thread(f.close)
+    return size
+
 
+async def read_upload_form(request, staging_dir: Path) -> tuple[dict, list[tuple[str, Path]]]:
+    # (text fields, [(filename, spooled path), ...]). The subject folder is
+    # only known once the form is parsed, so files are spooled into
+    # staging_dir (same filesystem) and moved after validation. Every part
+    # counts against MAX_UPLOAD_REQUEST_BYTES, each file against
+    # MAX_UPLOAD_FILE_BYTES.
+    await ensure_dir(staging_dir)
     reader = await request.multipart()
     data = {}
-    temp_paths = []
-
-    part = await reader.next()
-    while part is not None:
-        fieldname = part.name
-        if fieldname == 'files':
-            filename = part.filename
-            if filename:
-                temp_path = temp_dir / filename
-                with open(temp_path, 'wb') as f:
-                    while True:
-                        chunk = await part.read_chunk()
-                        if not chunk:
-                            break
-                        f.write(chunk)
-                temp_paths.append(str(temp_path))
-        else:
-            value = await part.read(decode=True)
-            data[fieldname] = value.decode('utf-8')
+    files = []
+    budget = MAX_UPLOAD_REQUEST_BYTES
+
+    try:
         part = await reader.next()
+        while part is not None:
+            if part.name == 'files':
+                if part.filename:
+                    spooled = staging_dir / f"{secrets.token_hex(8)}.part"
+                    files.append((part.filename, spooled))
+                    budget -= await spool_part(part, spooled, min(MAX_UPLOAD_FILE_BYTES, budget))
+            else:
+                raw = await read_part(part, budget)
+                data[part.name] = part.decode(bytes(raw)).decode('utf-8')
+                budget -= len(raw)
+            part = await reader.next()
+    except BaseException:
+        await asyncio.to_thread(_unlink_all, files)
+        raise
+    return data, files
+
+
+def upload_too_large():
+    return web.json_response({'status': 'error', 'message': 'Upload too large'}, status=413)
 
-    if not all(key in data for key in ['title', 'description', 'deadline', 'subject']):
-        return web.json_response({'status': 'error', 'message': 'Missing fields'}, status=400)
 
-    title = data['title']
-    description = data['description']
-    deadline = data['deadline']
-    subject = data['subject']
+async def handle_assignment_upload(request):
+    if not DEFAULT_GUILD_ID:
+        return web.json_response({'status': 'error', 'message': 'Server not configured'}, status=500)
+
+    guild_id = DEFAULT_GUILD_ID
 
     try:
-        dt = datetime.fromisoformat(deadline.replace('T', ' ') + ':00')
-        if dt <= datetime.now():
-            return web.json_response({'status': 'error', 'message': 'Deadline must be in the future'}, status=400)
-        deadline_str = dt.strftime("%Y-%m-%d %H:%M")
-    except ValueError:
-        return web.json_response({'status': 'error', 'message': 'Invalid deadline format'}, status=400)
+        data, files = await read_upload_form(request, Path("assets/assignments/temp"))
+    except UploadTooLarge:
+        return upload_too_large()
+
+    # Whatever wasn't moved into the subject folder is dropped on the way out
+    try:
+        if not all(key in data for key in ['title', 'description', 'deadline', 'subject']):
+            return web.json_response({'status': 'error', 'message': 'Missing fields'}, status=400)
 
-    assignments = await load_json(ASSIGNMENTS_FILE)
-    assignments.setdefault(guild_id, {})
+        title = data['title']
+        description = data['description']
+        deadline = data['deadline']
+        subject = data['subject']
 
-    assignment_id = str(uuid.uuid4())
-    assets_dir = Path("assets/assignments") / subject.replace(" ", "_")
-    assets_dir.mkdir(parents=True, exist_ok=True)
-    new_paths = []
+        try:
+            dt = datetime.fromisoformat(deadline.replace('T', ' ') + ':00')
+            if dt <= datetime.now():
+                return web.json_response({'status': 'error', 'message': 'Deadline must be in the future'}, status=400)
+            deadline_str = dt.strftime("%Y-%m-%d %H:%M")
+        except ValueError:
+            return web.json_response({'status': 'error', 'message': 'Invalid deadline format'}, status=400)
 
-    for temp_path_str in temp_paths:
-        temp_path = Path(temp_path_str)
-        new_path = assets_dir / temp_path.name
-        temp_path.rename(new_path)
-        new_paths.append(str(new_path))
+        assignment_id = secrets.token_hex(16)
+        assets_dir = Path("assets/assignments") / subject.replace(" ", "_")
+        new_paths = await move_files(files, assets_dir)
+    finally:
+        await asyncio.to_thread(_unlink_all, files)
 
     success = await db_add_assignment(guild_id, assignment_id, title, description, dt, subject, new_paths, 'web_upload')
 
@@ -2495,48 +3355,24 @@ async def handle_notes_upload(request):
 
     guild_id = DEFAULT_GUILD_ID
 
-    temp_dir = Path("assets/notes/temp")
-    temp_dir.mkdir(parents=True, exist_ok=True)
-
-    reader = await request.multipart()
-    data = {}
-    temp_paths = []
-
-    part = await reader.next()
-    while part is not None:
-        fieldname = part.name
-        if fieldname == 'files':
-            filename = part.filename
-            if filename:
-                temp_path = temp_dir / filename
-                with open(temp_path, 'wb') as f:
-                    while True:
-                        chunk = await part.read_chunk()
-                        if not chunk:
-                            break
-                        f.write(chunk)
-                temp_paths.append(str(temp_path))
-        else:
-            value = await part.read(decode=True)
-            data[fieldname] = value.decode('utf-8')
-        part = await reader.next()
-
-    if not all(key in data for key in ['title', 'subject']):
-        return web.json_response({'status': 'error', 'message': 'Missing fields'}, status=400)
+    try:
+        data, files = await read_upload_form(request, Path("assets/notes/temp"))
+    except UploadTooLarge:
+        return upload_too_large()
 
-    title = data['title']
-    subject = data['subject']
+    # Whatever wasn't moved into the subject folder is dropped on the way out
+    try:
+        if not all(key in data for key in ['title', 'subject']):
+            return web.json_response({'status': 'error', 'message': 'Missing fields'}, status=400)
 
-    note_id = str(uuid.uuid4())
-    assets_dir = Path("assets/notes") / subject.replace(" ", "_")
-    assets_dir.mkdir(parents=True, exist_ok=True)
-    new_paths = []
+        title = data['title']
+        subject = data['subject']
 
-    for temp_path_str in temp_paths:
-        temp_path = Path(temp_path_str)
-        new_path = assets_dir / temp_path.name
-        temp_path.rename(new_path)
-        new_paths.append(str(new_path))
+        note_id = secrets.token_hex(16)
+        assets_dir = Path("assets/notes") / subject.replace(" ", "_")
+        new_paths = await move_files(files, assets_dir)
+    finally:
+        await asyncio.to_thread(_unlink_all, files)
 
     success = await db_add_note(guild_id, note_id, title, subject, new_paths, 'web_upload')
 
@@ -2569,25 +3405,25 @@ async def cmd_create_notes(interaction: discord.Interaction):
 
 
 @tree.command(name="load-notes", description="Upload files to an existing note")
+@defer_first()
 async def cmd_load_notes(interaction: discord.Interaction):
     guild_id = str(interaction.guild_id)
-    notes_data = await db_get_notes(guild_id)
+    notes_data = await cached_rows(guild_id, "notes", db_get_notes)
+    notes_version = rows_version(guild_id, "notes", notes_data)  # before the waits below
 
     if not notes_data:
-        await interaction.response.send_message(
+        await interaction.followup.send(
             "No notes found. Create one first with `/create-notes`.",
             ephemeral=True
         )
         return
 
-    await interaction.response.send_message(
+    initial_msg = await interaction.followup.send(
         "Please reply to **this message** with your file attachments.\n"
         "(You can attach multiple files in one message)",
         ephemeral=False
     )
 
-    initial_msg = await interaction.original_response()
-
     def check(m: discord.Message):
         return (
             m.author.id == interaction.user.id
@@ -2605,24 +3441,15 @@ async def cmd_load_notes(interaction: discord.Interaction):
         await interaction.followup.send("No files were attached in your reply.", ephemeral=True)
         return
 
-    temp_dir = Path("assets/notes/temp")
-    temp_dir.mkdir(parents=True, exist_ok=True)
-    temp_paths = []
-
-    for att in msg.attachments:
-        temp_path = temp_dir / att.filename
-        await att.save(temp_path)
-        temp_paths.append(str(temp_path))
+    temp_paths = await save_attachments(msg.attachments, Path("assets/notes/temp"))
 
-    notes_list = [(n["note_id"], n) for n in notes_data]
-
-    if not notes_list:
+    if not notes_data:
         for p in temp_paths:
             Path(p).unlink(missing_ok=True)
         await interaction.followup.send("No notes available to assign to.", ephemeral=True)
         return
 
-    view = NoteAssignView(notes_list, temp_paths)
+    view = NoteAssignView(((n["note_id"], n) for n in notes_data), temp_paths, guild_id, notes_version)
 
     await interaction.followup.send(
         f"Uploaded **{len(temp_paths)}** file(s).\n"
@@ -2638,25 +3465,25 @@ async def cmd_create_assignment(interaction: discord.Interaction):
 
 
 @tree.command(name="load-assignment", description="Upload files to an existing assignment")
+@defer_first()
 async def cmd_load_assignment(interaction: discord.Interaction):
     guild_id = str(interaction.guild_id)
-    assignments = await db_get_assignments(guild_id)
+    assignments = await cached_rows(guild_id, "assignments", db_get_assignments)
+    assignments_version = rows_version(guild_id, "assignments", assignments)  # before the waits below
 
     if not assignments:
-        await interaction.response.send_message(
+        await interaction.followup.send(
             "No assignments found. Create one first with `/create-assignment`.",
             ephemeral=True
         )
         return
 
-    await interaction.response.send_message(
+    initial_msg = await interaction.followup.send(
         "Please reply to **this message** with your file attachments.\n"
         "(You can attach multiple files in one message)",
         ephemeral=False
     )
 
-    initial_msg = await interaction.original_response()
-
     def check(m: discord.Message):
         return (
             m.author.id == interaction.user.id
@@ -2674,24 +3501,16 @@ async def cmd_load_assignment(interaction: discord.Interaction):
         await interaction.followup.send("No files were attached in your reply.", ephemeral=True)
         return
 
-    temp_dir = Path("assets/assignments/temp")
-    temp_dir.mkdir(parents=True, exist_ok=True)
-    temp_paths = []
-
-    for att in msg.attachments:
-        temp_path = temp_dir / att.filename
-        await att.save(temp_path)
-        temp_paths.append(str(temp_path))
-
-    assign_list = [(a["assignment_id"], a) for a in assignments]
+    temp_paths = await save_attachments(msg.attachments, Path("assets/assignments/temp"))
 
-    if not assign_list:
+    if not assignments:
         for p in temp_paths:
             Path(p).unlink(missing_ok=True)
         await interaction.followup.send("No assignments available to assign to.", ephemeral=True)
         return
 
-    view = AssignmentAssignView(assign_list, temp_paths)
+    view = AssignmentAssignView(((a["assignment_id"], a) for a in assignments), temp_paths, guild_id,
+                                assignments_version)
 
     await interaction.followup.send(
         f"Uploaded **{len(temp_paths)}** file(s).\n"
@@ -2702,27 +3521,25 @@ async def cmd_load_assignment(interaction: discord.Interaction):
 
 
 @tree.command(name="fetch-notes", description="List and fetch study notes")
+@defer_first()
 async def cmd_fetch_notes(interaction: discord.Interaction):
     guild_id = str(interaction.guild_id)
-    notes_data = await db_get_notes(guild_id)
+    notes_data = await cached_rows(guild_id, "notes", db_get_notes)
 
     if not notes_data:
-        await interaction.response.send_message("No notes found in this server.", ephemeral=True)
+        await interaction.followup.send("No notes found in this server.", ephemeral=True)
         return
 
-    subjects = sorted(set(data['subject'] for data in notes_data))
+    list_text, options = note_subjects(guild_id, notes_data)
 
-    if not subjects:
-        await interaction.response.send_message("No subjects with notes found.", ephemeral=True)
+    if not options:
+        await interaction.followup.send("No subjects with notes found.", ephemeral=True)
         return
 
-    list_text = "**Available Subjects:**\n" + \
-        "\n".join(f"• {s}" for s in subjects)
+    view = SubjectSelectView(options)
 
-    view = SubjectSelectView(subjects)
-
-    await interaction.response.send_message(
-        list_text + "\n\nSelect a subject to view notes:",
+    await interaction.followup.send(
+        list_text,
         view=view,
         ephemeral=False
     )
@@ -2734,26 +3551,30 @@ async def cmd_fetch_notes(interaction: discord.Interaction):
     members="Mention members with @ (space separated)"
 )
 async def cmd_set_event(interaction: discord.Interaction, title: str, members: str):
-    member_ids = re.findall(r'<@!?(\d+)>', members)
+    member_ids = _MENTION_RE.findall(members)
     if not member_ids:
         await interaction.response.send_message("No valid members mentioned.", ephemeral=True)
         return
 
+    # The check above needs no await, so its ephemeral reply is always in
+    # time; acknowledge before the DB insert
+    await interaction.response.defer()
+
     guild_id = str(interaction.guild_id)
-    event_id = str(uuid.uuid4())
+    event_id = secrets.token_hex(16)
     creator_id = str(interaction.user.id)
 
     success = await db_add_event(guild_id, event_id, title, member_ids, creator_id, None, None)
 
     if not success:
-        await interaction.response.send_message("Failed to create event. Please try again.", ephemeral=True)
+        await interaction.followup.send("Failed to create event. Please try again.", ephemeral=True)
         return
 
     mentions_str = ' '.join(f'<@{mid}>' for mid in member_ids)
 
-    view = EventScheduleView(event_id, title)
+    view = EventScheduleView(event_id, title, member_ids)
 
-    await interaction.response.send_message(
+    await interaction.followup.send(
         f"Event **{title}** created with members: {mentions_str}\n\n"
         "Please select date and time below:",
         view=view
@@ -2761,17 +3582,18 @@ async def cmd_set_event(interaction: discord.Interaction, title: str, members: s
 
 
 @tree.command(name="delete-event", description="Delete an existing event")
+@defer_first(ephemeral=True)
 async def cmd_delete_event(interaction: discord.Interaction):
     guild_id = str(interaction.guild_id)
-    events = await db_get_events(guild_id)
+    events = await cached_rows(guild_id, "events", db_get_events)
 
     if not events:
-        await interaction.response.send_message("No events found in this server.", ephemeral=True)
+        await interaction.followup.send("No events found in this server.", ephemeral=True)
         return
 
-    event_list = [(e["event_id"], e) for e in events]
-    view = EventSelectView(event_list, action="delete")
-    await interaction.response.send_message(
+    view = EventSelectView(((e["event_id"], e) for e in events), action="delete", guild_id=guild_id,
+                           rows_version=rows_version(guild_id, "events", events))
+    await interaction.followup.send(
         "Select the event you want to **delete**:",
         view=view,
         ephemeral=True
@@ -2779,17 +3601,18 @@ async def cmd_delete_event(interaction: discord.Interaction):
 
 
 @tree.command(name="edit-event", description="Edit an existing event (placeholder)")
+@defer_first(ephemeral=True)
 async def cmd_edit_event(interaction: discord.Interaction):
     guild_id = str(interaction.guild_id)
-    events = await db_get_events(guild_id)
+    events = await cached_rows(guild_id, "events", db_get_events)
 
     if not events:
-        await interaction.response.send_message("No events found in this server.", ephemeral=True)
+        await interaction.followup.send("No events found in this server.", ephemeral=True)
         return
 
-    event_list = [(e["event_id"], e) for e in events]
-    view = EventSelectView(event_list, action="edit")
-    await interaction.response.send_message(
+    view = EventSelectView(((e["event_id"], e) for e in events), action="edit", guild_id=guild_id,
+                           rows_version=rows_version(guild_id, "events", events))
+    await interaction.followup.send(
         "Select the event you want to **edit** (full edit coming soon):",
         view=view,
         ephemeral=True
@@ -2801,72 +3624,83 @@ async def cmd_stop_reminder(interaction: discord.Interaction):
     guild_id = str(interaction.guild_id)
     user_id = str(interaction.user.id)
 
-    if guild_id not in active_reminders or not active_reminders[guild_id]:
+    # Only the user's own events in this guild, via the reverse index
+    user_keys = list(reminded_users.get((interaction.guild_id, interaction.user.id), ()))
+    if not user_keys and not any(key[0] == guild_id for key in active_reminders):
         await interaction.response.send_message("You are not currently being reminded for any events.", ephemeral=True)
         return
 
     stopped_titles = []
     fully_cleared_titles = []
+    cleared_event_ids = []
 
-    for event_id, data in list(active_reminders[guild_id].items()):
-        if user_id in data['remaining']:
-            data['remaining'].remove(user_id)
-            stopped_titles.append(data['title'])
-
-            if len(data['remaining']) == 0:
-                fully_cleared_titles.append(data['title'])
+    for key in user_keys:
+        unindex_reminder_user(key, user_id)
+        data = active_reminders.get(key)
+        if data is not None and user_id in data.remaining:
+            data.remaining.discard(user_id)
+            stopped_titles.append(data.title)
 
-                if guild_id in scheduled_tasks and event_id in scheduled_tasks[guild_id]:
-                    scheduled_tasks[guild_id][event_id].cancel()
-                    del scheduled_tasks[guild_id][event_id]
+            if not data.remaining:
+                fully_cleared_titles.append(data.title)
+                cleared_event_ids.append(key[1])
 
-                del active_reminders[guild_id][event_id]
+                task = scheduled_tasks.pop(key, None)
+                if task:
+                    task.cancel()
 
-                success = await db_delete_event(guild_id, event_id)
-                if not success:
-                    print(f"Error deleting event {event_id} from database during stop-reminder.")
-
-    if guild_id in active_reminders and not active_reminders[guild_id]:
-        del active_reminders[guild_id]
+                active_reminders.pop(key, None)
 
     if not stopped_titles:
         await interaction.response.send_message("You weren't in any active reminder lists.", ephemeral=True)
         return
 
+    # Everything above is in memory; acknowledge before the DB deletes
+    if cleared_event_ids:
+        await interaction.response.defer()
+        results = await asyncio.gather(*(db_delete_event(guild_id, eid) for eid in cleared_event_ids))
+        for event_id, success in zip(cleared_event_ids, results):
+            if not success:
+                print(f"Error deleting event {event_id} from database during stop-reminder.")
+
     reply = f"Stopped reminders for: **{', '.join(stopped_titles)}**"
 
     if fully_cleared_titles:
         reply += f"\n\n**All members have stopped reminders for:** {', '.join(fully_cleared_titles)}\n"
         reply += "These events have been fully cleared and deleted."
 
-    await interaction.response.send_message(reply, ephemeral=False)
+    if interaction.response.is_done():
+        await interaction.followup.send(reply)
+    else:
+        await interaction.response.send_message(reply, ephemeral=False)
 
 
 @tree.command(name="fetch-assignments", description="List and fetch assignments")
+@defer_first()
 async def cmd_fetch_assignments(interaction: discord.Interaction):
     guild_id = str(interaction.guild_id)
-    assignments = await db_get_assignments(guild_id)
+    assignments = await cached_rows(guild_id, "assignments", db_get_assignments)
 
     if not assignments:
-        await interaction.response.send_message("No assignments found in this server.", ephemeral=True)
+        await interaction.followup.send("No assignments found in this server.")
         return
 
     assign_list = [(a["assignment_id"], a) for a in assignments if a.get('subject')]
 
     if not assign_list:
-        await interaction.response.send_message("No complete assignments found.", ephemeral=True)
+        await interaction.followup.send("No complete assignments found.")
         return
 
-    list_text = "**Available Assignments:**\n"
-    for _, data in assign_list:
-        list_text += f"• {data['subject']} | {data['title']} | Deadline: {data['deadline']}\n"
+    list_text = "**Available Assignments:**\n" + "".join([
+        f"• {data['subject']} | {data['title']} | Deadline: {data['deadline']}\n"
+        for _, data in assign_list
+    ])
 
-    view = AssignmentSelectView(assign_list)
+    view = AssignmentSelectView(assign_list, guild_id, rows_version(guild_id, "assignments", assignments))
 
-    await interaction.response.send_message(
+    await interaction.followup.send(
         list_text + "\nSelect one to view/download files:",
-        view=view,
-        ephemeral=False
+        view=view
     )
 
 # ────────────────────────────────────────────────
@@ -2924,6 +3758,7 @@ class PersonalitySelectView(ui.View):
             )
 
 @tree.command(name="joi-personality", description="Select JOI's personality for your conversations")
+@defer_first(ephemeral=True)
 async def cmd_joi_personality(interaction: discord.Interaction):
     user_id = str(interaction.user.id)
     current_personality = await db_get_personality(user_id)
@@ -2934,34 +3769,124 @@ async def cmd_joi_personality(interaction: discord.Interaction):
 
     view = PersonalitySelectView(current_personality_id=current_personality_id)
     
-    await interaction.response.send_message(
+    await interaction.followup.send(
         "Choose JOI's personality:",
         view=view,
         ephemeral=True
     )
 
+TALK_EDIT_INTERVAL = 1.0  # seconds between streamed edits of the /talk reply
+TALK_SESSION_IDLE = 600    # a chat unused this long is rebuilt from the DB
+TALK_SESSION_SWEEP = 300   # how often idle chats are dropped
+TALK_HISTORY_MESSAGES = 10  # last 5 turns, as when rebuilding from the DB
+
+
+@dataclass(slots=True)
+class TalkSession:
+    chat: genai.ChatSession
+    system_prompt: str
+    last_used: float
+
+
+_talk_sessions = {}  # user_id → TalkSession
+
+
+@functools.lru_cache(maxsize=256)
+def talk_model(system_prompt: str) -> genai.GenerativeModel:
+    # One model per distinct personality + mood prompt; chats are per user
+    return genai.GenerativeModel(model_name=MODEL_NAME, system_instruction=system_prompt)
+
+
+def trim_history(chat: genai.ChatSession):
+    history = chat.history
+    if len(history) > TALK_HISTORY_MESSAGES:
+        history = history[-TALK_HISTORY_MESSAGES:]
+        while history and history[0].role != "user":
+            history = history[1:]
+        chat.history = history
+
+
+async def sweep_talk_sessions():
+    while True:
+        await asyncio.sleep(TALK_SESSION_SWEEP)
+        cutoff = time.monotonic() - TALK_SESSION_IDLE
+        for user_id in [u for u, session in _talk_sessions.items() if session.last_used < cutoff]:
+            del _talk_sessions[user_id]
+
+
+def format_talk_reply(prompt: str, response_text: str) -> str:
+    full_response_content = f"**You:** {prompt}\n**JOI:** {response_text}"
+
+    # Discord message limit is 2000 characters.
+    # If the combined message exceeds this, we need to truncate.
+    # Prioritize showing the full prompt and then as much of the response as possible.
+    if len(full_response_content) > 2000:
+        # Calculate available space for response_text after "You: {prompt}\nJOI: "
+        # Adding 12 for "**You:** ", 10 for "\n**JOI:** " and 3 for "..."
+        prompt_prefix_len = len(f"**You:** {prompt}\n**JOI:** ")
+        available_for_response = 2000 - prompt_prefix_len - 3 # -3 for ellipsis
+
+        if available_for_response > 0:
+            truncated_response_text = response_text[:available_for_response] + "..."
+            full_response_content = f"**You:** {prompt}\n**JOI:** {truncated_response_text}"
+        else:
+            # Fallback if prompt is too long itself, though unlikely for a prompt field
+            full_response_content = f"**You:** {prompt[:1990]}...\n**JOI:** (Response too long)"
+
+    return full_response_content
+
+
 @tree.command(name="talk", description="Talk to JOI (Gemini AI)")
 @app_commands.describe(prompt="Your message to JOI")
 async def cmd_talk(interaction: discord.Interaction, prompt: str):
     user_id = str(interaction.user.id)
     discord_username = interaction.user.name # Get Discord username
 
-    # Check if user information exists
-    user_info = await db_get_user_info(user_id)
+    # send_modal needs an un-acknowledged interaction, so the modal-or-defer
+    # decision is made from memory; the profile read happens after the defer
+    if known_users is None:
+        # Check if user information exists
+        user_info = await db_get_user_info(user_id)
 
-    if user_info is None:
-        # First-time user: present modal to gather info
+        if user_info is None:
+            # First-time user: present modal to gather info
+            await interaction.response.send_modal(UserInfoModal())
+            # The interaction will be responded to and handled by the modal's on_submit
+            return
+
+        # Defer the response for AI processing time
+        await interaction.response.defer()
+    elif user_id not in known_users:
         await interaction.response.send_modal(UserInfoModal())
-        # The interaction will be responded to and handled by the modal's on_submit
         return
+    else:
+        await interaction.response.defer()
+        user_info = None  # read below, together with the other lookups
 
-    # Defer the response for AI processing time
-    await interaction.response.defer()
-
+    msg = None  # the streamed reply, once posted
     try:
-        # Get user's selected personality
-        current_personality_data = await db_get_personality(user_id)
-        
+        now = time.monotonic()
+        session = _talk_sessions.get(user_id)
+        cold = session is None or now - session.last_used > TALK_SESSION_IDLE
+
+        # Independent reads run concurrently: the history a cold session will
+        # need, the profile (unless loaded above) and the selected personality
+        history_task = asyncio.create_task(db_get_conversation_history(user_id, limit=5)) if cold else None
+        if user_info is None:
+            user_info, current_personality_data = await asyncio.gather(
+                db_get_user_info(user_id), db_get_personality(user_id))
+        else:
+            current_personality_data = await db_get_personality(user_id)
+
+        if user_info is None:
+            if history_task is not None:
+                history_task.cancel()
+            await interaction.followup.send(
+                "I couldn't load your profile right now. Please try again later.",
+                ephemeral=True
+            )
+            return
+
         system_prompt_to_use = PERSONALITIES["classic"]["prompt"] # Default to Classic
         if current_personality_data and current_personality_data["personality_id"] in PERSONALITIES:
             system_prompt_to_use = PERSONALITIES[current_personality_data["personality_id"]]["prompt"]
@@ -2971,56 +3896,67 @@ async def cmd_talk(interaction: discord.Interaction, prompt: str):
         if user_info['mood'] and user_info['mood'] != "Not specified":
             dynamic_system_prompt += f"\nThe user, named {user_info['username']}, is currently feeling {user_info['mood']}."
 
-        # Retrieve conversation history
-        conversation_history = await db_get_conversation_history(user_id, limit=5) # Get last 5 turns
-        
-        # Prepare history for Gemini model
-        history_for_gemini = []
-        for conv_turn in conversation_history:
-            history_for_gemini.append({"role": "user", "parts": [conv_turn["user_message"]]})
-            # Ensure bot_response is not None before adding
-            if conv_turn["bot_response"]:
-                history_for_gemini.append({"role": "model", "parts": [conv_turn["bot_response"]]})
-
-        model = genai.GenerativeModel(model_name=MODEL_NAME, system_instruction=dynamic_system_prompt)
-        chat = model.start_chat(history=history_for_gemini) # Initialize chat with history
-
-        response = chat.send_message(prompt)
-
-        response_text = response.text
+        # A warm chat already holds the recent turns; only a new, idle or
+        # re-prompted (personality/mood changed) one is rebuilt from the DB
+        if cold or session.system_prompt != dynamic_system_prompt:
+            # Retrieve conversation history
+            if history_task is not None:
+                conversation_history = await history_task
+            else:
+                conversation_history = await db_get_conversation_history(user_id, limit=5) # Get last 5 turns
+
+            # Prepare history for Gemini model
+            history_for_gemini = []
+            for conv_turn in conversation_history:
+                history_for_gemini.append({"role": "user", "parts": [conv_turn["user_message"]]})
+                # Ensure bot_response is not None before adding
+                if conv_turn["bot_response"]:
+                    history_for_gemini.append({"role": "model", "parts": [conv_turn["bot_response"]]})
+
+            chat = talk_model(dynamic_system_prompt).start_chat(history=history_for_gemini) # Initialize chat with history
+            session = _talk_sessions[user_id] = TalkSession(chat, dynamic_system_prompt, now)
+        else:
+            trim_history(session.chat)
+        session.last_used = now
+        chat = session.chat
+
+        # Stream the reply into one message: the first chunk shows up as soon
+        # as Gemini produces it, and edits are spaced to stay under Discord's
+        # edit rate limit
+        stream = await chat.send_message_async(prompt, stream=True)
+        msg = await interaction.followup.send(format_talk_reply(prompt, "…"), wait=True)
+
+        loop = asyncio.get_running_loop()
+        parts = []
+        last_edit = loop.time()
+        async for chunk in stream:
+            parts.append(chunk.text)
+            if loop.time() - last_edit >= TALK_EDIT_INTERVAL:
+                await msg.edit(content=format_talk_reply(prompt, "".join(parts)))
+                last_edit = loop.time()
+
+        response_text = "".join(parts)
         if len(response_text) > 2000:
             response_text = response_text[:1997] + "..."
 
-        full_response_content = f"**You:** {prompt}\n**JOI:** {response_text}"
-        
-        # Discord message limit is 2000 characters.
-        # If the combined message exceeds this, we need to truncate.
-        # Prioritize showing the full prompt and then as much of the response as possible.
-        if len(full_response_content) > 2000:
-            # Calculate available space for response_text after "You: {prompt}\nJOI: "
-            # Adding 12 for "**You:** ", 10 for "\n**JOI:** " and 3 for "..."
-            prompt_prefix_len = len(f"**You:** {prompt}\n**JOI:** ")
-            available_for_response = 2000 - prompt_prefix_len - 3 # -3 for ellipsis
-
-            if available_for_response > 0:
-                truncated_response_text = response_text[:available_for_response] + "..."
-                full_response_content = f"**You:** {prompt}\n**JOI:** {truncated_response_text}"
-            else:
-                # Fallback if prompt is too long itself, though unlikely for a prompt field
-                full_response_content = f"**You:** {prompt[:1990]}...\n**JOI:** (Response too long)"
-
+        await msg.edit(content=format_talk_reply(prompt, response_text))
 
-        await interaction.followup.send(full_response_content)
-
-        # Log the current conversation turn
-        await db_add_conversation(user_id, prompt, response_text)
+        # Log the current conversation turn; the reply is already visible
+        spawn(db_add_conversation(user_id, prompt, response_text), name="db_add_conversation")
 
     except Exception as e:
         print(f"Error in /talk command for user {user_id}: {e}")
-        await interaction.followup.send(
-            "I'm sorry, I couldn't process that. Please try again later.",
-            ephemeral=True
-        )
+        _talk_sessions.pop(user_id, None)  # history may hold a half-finished turn
+        error_text = "I'm sorry, I couldn't process that. Please try again later."
+        # Once the reply is posted, replace its "…" or partial text rather
+        # than leaving it looking like JOI is still typing
+        if msg is not None:
+            try:
+                await msg.edit(content=format_talk_reply(prompt, error_text))
+                return
+            except discord.HTTPException:
+                pass
+        await interaction.followup.send(error_text, ephemeral=True)
 
 
 @tree.command(name="play", description="Add a song to the queue and play it (YouTube URL)")
@@ -3098,7 +4034,7 @@ async def cmd_play(interaction: discord.Interaction, url: str):
         try:
             msg = music_messages[guild_id]
             await msg.edit(embed=embed, view=view)
-        except:
+        except discord.HTTPException:
             pass  # message deleted or something
 
     msg = await interaction.followup.send(embed=embed, view=view)
@@ -3120,7 +4056,7 @@ async def play_next(guild_id: str, voice_client):
                     embed=None,
                     view=None
                 )
-            except:
+            except discord.HTTPException:
                 pass
         if voice_client.is_connected():
             await voice_client.disconnect()
@@ -3159,7 +4095,7 @@ async def play_next(guild_id: str, voice_client):
 
             try:
                 await music_messages[guild_id].edit(embed=embed, view=music_views.get(guild_id))
-            except:
+            except discord.HTTPException:
                 pass
 
     except Exception as e:
@@ -3202,20 +4138,30 @@ async def cmd_stop(interaction: discord.Interaction):
             ephemeral=True
         )
 
-@tree.command(name="timetable", description="Shows your timetable as an image")
-async def cmd_timetable(interaction: discord.Interaction):
-    await interaction.response.defer()
+TIMETABLE_PATH = Path("assets/timetable.jpeg")
+_timetable_bytes = None  # read in init_services and by /reload-timetable
 
-    image_path = "assets/timetable.jpeg"
 
-    if not os.path.isfile(image_path):
-        await interaction.followup.send(
-            f"Timetable image not found at `{image_path}`.",
+def load_timetable():
+    global _timetable_bytes
+    try:
+        _timetable_bytes = TIMETABLE_PATH.read_bytes()
+    except OSError:
+        _timetable_bytes = None
+    return _timetable_bytes
+
+
+@tree.command(name="timetable", description="Shows your timetable as an image")
+async def cmd_timetable(interaction: discord.Interaction):
+    if _timetable_bytes is None:
+        await interaction.response.send_message(
+            f"Timetable image not found at `{TIMETABLE_PATH}`.",
             ephemeral=True
         )
         return
 
-    file = discord.File(image_path, filename="timetable.png")
+    # discord.File consumes its stream, so each send gets a fresh BytesIO
+    file = discord.File(io.BytesIO(_timetable_bytes), filename="timetable.png")
 
     embed = discord.Embed(
         title=f"{interaction.user.display_name}'s Timetable",
@@ -3225,7 +4171,32 @@ async def cmd_timetable(interaction: discord.Interaction):
     embed.set_footer(
         text="JOI - EVERYTHING YOU WANT TO SEE, EVERYTHING YOU WANT TO HEAR")
 
-    await interaction.followup.send(embed=embed, file=file)
+    await interaction.response.send_message(embed=embed, file=file)
+
+
+@tree.command(name="reload-timetable", description="Re-read the timetable image from disk (admin only)")
+async def cmd_reload_timetable(interaction: discord.Interaction):
+    if interaction.user.name.lower() != "sidhartheverett":
+        await interaction.response.send_message(
+            "⛔ This command is restricted to **sidhartheverett** only.",
+            ephemeral=True
+        )
+        return
+
+    if await asyncio.to_thread(load_timetable) is None:
+        await interaction.response.send_message(
+            f"Timetable image not found at `{TIMETABLE_PATH}`.", ephemeral=True)
+        return
+    await interaction.response.send_message("Timetable reloaded ✓", ephemeral=True)
+
+
+def _format_dates(dates: list[str], overflow: str) -> str:
+    # Embed field values cap at 1024 chars; size the join before building it
+    if not dates:
+        return "None"
+    if sum(map(len, dates)) + len(dates) - 1 > 1024:
+        return overflow
+    return "\n".join(dates)
 
 
 @tree.command(name="check-attendance", description="Check your attendance from Firebase")
@@ -3239,16 +4210,15 @@ async def cmd_check_attendance(interaction: discord.Interaction):
         await interaction.followup.send("No registration number found for your username. Please use `/register <your_registration_number>` to register.")
         return
 
-    student = next((s for s in students if s["reg"] == reg), None)
+    student = students_by_reg.get(reg)
     if not student:
         await interaction.followup.send("Invalid registration number associated with your username.")
         return
 
     name = student["name"]
 
-    loop = asyncio.get_running_loop()
     try:
-        attendance = await loop.run_in_executor(None, get_attendance_data, reg)
+        attendance = await cached_attendance(reg)
     except Exception as e:
         await interaction.followup.send(f"Error fetching attendance: {str(e)}")
         return
@@ -3276,20 +4246,11 @@ async def cmd_check_attendance(interaction: discord.Interaction):
     embed.add_field(name="Safe Leave Days", value=str(
         attendance["safe_leave_days"]), inline=False)
 
-    abs_str = "\n".join(attendance["abs_dates"]
-                        ) if attendance["abs_dates"] else "None"
-    if len(abs_str) > 1024:
-        abs_str = f"Too many to list ({attendance['absent']} absent days). Check website for details."
-
-    int_str = "\n".join(attendance["int_dates"]
-                        ) if attendance["int_dates"] else "None"
-    if len(int_str) > 1024:
-        int_str = f"Too many to list."
-
-    ext_str = "\n".join(attendance["ext_dates"]
-                        ) if attendance["ext_dates"] else "None"
-    if len(ext_str) > 1024:
-        ext_str = f"Too many to list."
+    abs_str = _format_dates(
+        attendance["abs_dates"],
+        f"Too many to list ({attendance['absent']} absent days). Check website for details.")
+    int_str = _format_dates(attendance["int_dates"], "Too many to list.")
+    ext_str = _format_dates(attendance["ext_dates"], "Too many to list.")
 
     embed.add_field(name="Absent Dates (DD-MM-YYYY)",
                     value=abs_str, inline=False)
@@ -3319,13 +4280,17 @@ async def cmd_call(interaction: discord.Interaction, delay_minutes: int, members
         await interaction.response.send_message("Delay must be at least 1 minute.", ephemeral=True)
         return
 
-    member_ids = re.findall(r'<@!?(\d+)>', members)
+    member_ids = _MENTION_RE.findall(members)
     if not member_ids:
         await interaction.response.send_message("No valid members mentioned.", ephemeral=True)
         return
 
+    # The checks above are synchronous, so their ephemeral replies are always
+    # in time; acknowledge before scheduling anything
+    await interaction.response.defer()
+
     guild_id = str(interaction.guild_id)
-    call_id = str(uuid.uuid4())
+    call_id = secrets.token_hex(16)
 
     call_data = {
         'members': member_ids,
@@ -3339,12 +4304,11 @@ async def cmd_call(interaction: discord.Interaction, delay_minutes: int, members
 
     mentions_str = ' '.join(f'<@{mid}>' for mid in member_ids)
 
-    await interaction.response.send_message(
+    await interaction.followup.send(
         f"📞 **Mass call scheduled** in **{delay_minutes} minute(s)**!\n"
         f"Members: {mentions_str}\n"
         f"Message: {call_data['message']}\n\n"
-        "They will be pinged every **2 seconds** until they use `/stop-calling`",
-        ephemeral=False
+        "They will be pinged every **2 seconds** until they use `/stop-calling`"
     )
 
 
@@ -3353,29 +4317,28 @@ async def cmd_stop_calling(interaction: discord.Interaction):
     guild_id = str(interaction.guild_id)
     user_id = str(interaction.user.id)
 
-    if guild_id not in active_calls or not active_calls[guild_id]:
+    guild_calls = [(key, call) for key, call in active_calls.items() if key[0] == guild_id]
+    if not guild_calls:
         await interaction.response.send_message("No active calls are running for you right now.", ephemeral=True)
         return
 
     stopped_any = False
     cleared_calls = []
 
-    for call_id, data in list(active_calls[guild_id].items()):
-        if user_id in data['remaining']:
-            data['remaining'].remove(user_id)
+    for key, call in guild_calls:
+        if user_id in call.remaining:
+            call.remaining.discard(user_id)
+            call.wake.set()
             stopped_any = True
 
-            if len(data['remaining']) == 0:
-                cleared_calls.append(data.get('message', 'Call'))
-
-                if guild_id in scheduled_call_tasks and call_id in scheduled_call_tasks[guild_id]:
-                    scheduled_call_tasks[guild_id][call_id].cancel()
-                    del scheduled_call_tasks[guild_id][call_id]
+            if not call.remaining:
+                cleared_calls.append(call.message or 'Call')
 
-                del active_calls[guild_id][call_id]
+                task = scheduled_call_tasks.pop(key, None)
+                if task:
+                    task.cancel()
 
-    if guild_id in active_calls and not active_calls[guild_id]:
-        del active_calls[guild_id]
+                active_calls.pop(key, None)
 
     if not stopped_any:
         await interaction.response.send_message("You weren't in any active call spam lists.", ephemeral=True)
@@ -3393,44 +4356,69 @@ async def cmd_stop_calling(interaction: discord.Interaction):
 # BOT EVENTS
 # ────────────────────────────────────────────────
 
+async def init_services():
+    genai.configure(api_key=GEMINI_API_KEY)
+    await asyncio.to_thread(create_db_pool)
+    global known_users
+    known_users = await db_load_known_users()
+    await asyncio.to_thread(init_firebase)
+    await asyncio.to_thread(lab_subject_pages)  # warm the subject index
+    await asyncio.to_thread(load_timetable)
+
+
+@bot.event
+async def setup_hook():
+    # Runs once, inside the event loop, before the gateway connects
+    eager_task_factory = getattr(asyncio, "eager_task_factory", None)  # 3.12+
+    if eager_task_factory is not None:
+        asyncio.get_running_loop().set_task_factory(eager_task_factory)
+    await init_services()
+    spawn(sweep_talk_sessions(), name="sweep_talk_sessions")
+    spawn(sweep_schedules(), name="sweep_schedules")
+    # Off by default; when enabled, bind the site in the background so a
+    # slow start never holds up the gateway login
+    if WEB_UPLOADS_ENABLED:
+        spawn(start_web(), name="web_server")
+
+
+async def restore_schedules():
+    # One query per table for all guilds; schedule_* only park TimerHandles
+    global schedules_restored
+    events, reminders = await asyncio.gather(db_get_upcoming_events(), db_get_upcoming_reminders())
+    if events is None or reminders is None:
+        print("[JOI] Could not load pending events/reminders; will retry on the next ready.")
+        return
+    # Marked only once both reads came back; re-checked after the await in
+    # case an overlapping on_ready got here first
+    if schedules_restored:
+        return
+    schedules_restored = True
+    for guild_id, event in events:
+        schedule_spam(guild_id, event['event_id'], event)
+    for guild_id, reminder in reminders:
+        schedule_reminder(guild_id, reminder['reminder_id'], reminder)
+    print(f"[JOI] Restored {len(events)} event(s) and {len(reminders)} reminder(s).")
+
+
 @bot.event
 async def on_ready():
     print(f"[JOI] Logged in as {bot.user}")
-    try:
-        synced = await tree.sync()
-        print(f"Synced {len(synced)} command(s)")
-    except Exception as e:
-        print(f"Sync failed: {e}")
+    # The command sync is a Discord round-trip that nothing below depends
+    # on; let it run while the database is set up and schedules restored
+    sync_task = asyncio.create_task(tree.sync())
 
     await initialize_db()
     print("[DB] Database initialized.")
 
-    # Restore scheduled event reminders (placeholder for database implementation)
-    # events = await load_json(EVENTS_FILE)
-    # for guild_id in events:
-    #     for event_id, event in events[guild_id].items():
-    #         if event.get('datetime'):
-    #             try:
-    #                 dt = datetime.fromisoformat(event['datetime'])
-    #                 if dt > datetime.now():
-    #                     schedule_spam(guild_id, event_id, event)
-    #             except:
-    #                 pass
-
-    # Restore scheduled group reminders (the new @everyone ones) (placeholder for database implementation)
-    # reminders = await load_json(REMINDERS_FILE)
-    # for guild_id in reminders:
-    #     for reminder_id, reminder in reminders[guild_id].items():
-    #         if reminder.get('datetime'):
-    #             try:
-    #                 dt = datetime.fromisoformat(reminder['datetime'])
-    #                 if dt > datetime.now():
-    #                     schedule_reminder(guild_id, reminder_id, reminder)
-    #             except:
-    #                 pass
-
-    # await start_web()
-    # Web server integration will be updated to use the database.
+    # on_ready fires again after every reconnect; the timers survive those
+    if not schedules_restored:
+        await restore_schedules()
+
+    try:
+        synced = await sync_task
+        print(f"Synced {len(synced)} command(s)")
+    except Exception as e:
+        print(f"Sync failed: {e}")
 
 
 @bot.event
@@ -3438,20 +4426,20 @@ async def on_message(message):
     if message.author.bot:
         return
 
-    if bot.user not in message.mentions:
+    # DMs, plain chatter, or nobody is being pinged anywhere
+    if message.guild is None or not reminded_users or bot.user not in message.mentions:
         await bot.process_commands(message)
         return
 
-    guild_id = str(message.guild.id)
-    user_id = str(message.author.id)
-
-    stopped_any = False
-
-    if guild_id in active_reminders:
-        for event_id, data in list(active_reminders[guild_id].items()):
-            if user_id in data['remaining']:
-                data['remaining'].remove(user_id)
-                stopped_any = True
+    # Only the events this user is still pinged for, via the reverse index;
+    # the member sets hold string ids, built only once there's a hit
+    keys = reminded_users.pop((message.guild.id, message.author.id), None)
+    if keys:
+        user_id = str(message.author.id)
+        for key in keys:
+            data = active_reminders.get(key)
+            if data is not None:
+                data.remaining.discard(user_id)
 
     await bot.process_commands(message)
 
@@ -3459,4 +4447,9 @@ async def on_message(message):
 # ────────────────────────────────────────────────
 # START BOT
 # ────────────────────────────────────────────────
+# bot.run() creates its loop through the policy, so this covers the gateway,
+# the web server and every DB await
+if uvloop is not None:
+    uvloop.install()
+
 bot.run(DISCORD_BOT_TOKEN)